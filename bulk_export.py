@@ -0,0 +1,250 @@
+'''
+Module of 'excel.py' that writes the included columns of insert worksheets as
+bulk load files instead of scripts: a delimited data file, a bcp format file
+describing its fields and an INSERT statement that loads the data file with
+the format file through OPENROWSET(BULK ...). Loading these files skips
+parsing a statement for every row, so large worksheets load at bulk load
+speed.
+Matt Saffert
+2-10-2020
+'''
+
+from excel_constants import *
+import collections
+import decimal
+import os
+import re
+import excel_global
+import script_generator
+
+
+'''
+The files written for one worksheet and the statement that loads them.
+ex. ('Sheet1', 'C:/out/Sheet1.dat', 'C:/out/Sheet1.fmt', 'INSERT INTO ...', 20000)
+'''
+BulkFiles = collections.namedtuple(
+    'BulkFiles', ['title', 'data_file', 'format_file', 'statement', 'rows'])
+
+'''
+Script types that can be loaded from bulk load files
+'''
+BULK_SCRIPT_TYPES = ['insert']
+
+
+def formatBulkValue(value, base=None):
+    '''Formats a parameter value (see script_generator.StatementPlan.getParameterRows())
+    as the text of a field of a bulk load data file. Missing values are
+    written as empty fields, which are loaded as NULL. Date/time values are
+    written to the precision of their column's type (the SqlType base name),
+    the same way as in scripts, since SQL Server cannot convert more
+    fractional digits than the type holds.
+    ex. datetime(2020, 2, 1, 10, 30, 0, 123456), 'datetime' -> '2020-02-01T10:30:00.123'
+
+    :param1 value: ?
+    :param2 base: str
+
+    :return: str
+    '''
+
+    if value is None:
+        return ''
+    elif isinstance(value, bool):
+        return '1' if value else '0'
+    elif isinstance(value, decimal.Decimal):  # never in scientific notation
+        return format(value, 'f')
+    elif isinstance(value, bytes):  # binary fields are written as hex without 0x
+        return value.hex().upper()
+    elif hasattr(value, 'isoformat'):  # datetime, date and time
+        if base in script_generator.DATETIME_LITERAL_FORMATS:
+            return script_generator.formatDatetimeValue(value, base)
+        return value.isoformat(sep=' ') if hasattr(value, 'date') else value.isoformat()
+
+    return str(value)
+
+
+def getBulkFileName(title):
+    '''Gets the name of the files of a worksheet from its title, with every
+    character that may not be valid in a file name replaced by "_".
+    ex. 'Sheet 1/2' -> 'Sheet_1_2'
+
+    :param1 title: str
+
+    :return: str
+    '''
+
+    return re.sub(r'[^\w\-]', '_', title)
+
+
+def formatBulkRows(statement_plan, data, title, row_offset=0):
+    '''Formats each row of data as a line of the bulk load data file, ending in
+    the row terminator. Raises a ValueError if a value contains the field or
+    row terminator, which would split it into more fields or rows.
+
+    :param1 statement_plan: script_generator.StatementPlan
+    :param2 data: pandas.core.frame.DataFrame
+    :param3 title: str
+    :param4 row_offset: int
+
+    :return: List[str]
+    '''
+
+    bases = [getSqlType(column_type).base
+             for column_type in statement_plan.parameter_types]
+    lines = []
+    for row, values in enumerate(statement_plan.getParameterRows(data)):
+        fields = [formatBulkValue(value, base)
+                  for value, base in zip(values, bases)]
+        for column, field in zip(statement_plan.parameter_columns, fields):
+            if BULK_FIELD_TERMINATOR in field or any(character in field for character in BULK_ROW_TERMINATOR):
+                excel_cell = excel_global.getExcelCellToInsertInto(
+                    column[0], row + START_OF_DATA_ROWS_INDEX + row_offset)
+                raise ValueError('The value in cell ' + title + '!' + excel_cell +
+                                 ' contains a tab or line break and cannot be written to a bulk load file')
+        lines.append(BULK_FIELD_TERMINATOR.join(fields) + BULK_ROW_TERMINATOR)
+
+    return lines
+
+
+def createFormatFile(statement_plan):
+    '''Creates the text of the non-XML bcp format file of a worksheet's data
+    file. Every field is character data ended by the field terminator, or the
+    row terminator for the last field. Fields are numbered as the columns of
+    the rowset OPENROWSET(BULK ...) reads from the file, named by the columns
+    in the worksheet, so they are matched to the table's columns by name
+    wherever those are in the table.
+
+    ex. 14.0
+        2
+        1       SQLCHAR       0       0       "\\t"       1     Id       ""
+        2       SQLCHAR       0       0       "\\r\\n"     2     Name     ""
+
+    :param1 statement_plan: script_generator.StatementPlan
+
+    :return: str
+    '''
+
+    columns = statement_plan.parameter_columns
+    lines = [BULK_FORMAT_VERSION, str(len(columns))]
+    for field, column in enumerate(columns):
+        terminator = BULK_ROW_TERMINATOR if field == len(
+            columns) - 1 else BULK_FIELD_TERMINATOR
+        lines.append('\t'.join([str(field + 1), 'SQLCHAR', '0', '0',
+                                '"' + terminator.encode('unicode_escape').decode() + '"',
+                                str(field + 1), column[1], '""']))
+
+    return '\r\n'.join(lines) + '\r\n'
+
+
+def createBulkInsertStatement(table_name, column_names, data_file, format_file):
+    '''Creates the statement that loads a data file into the named columns of
+    a table with its format file, selecting the columns from OPENROWSET(BULK ...)
+    by name. Empty fields are loaded as NULL rather than the column's default
+    and columns that are not named get their default.
+
+    ex. INSERT INTO t WITH (TABLOCK) (Id, Name) SELECT Id, Name FROM OPENROWSET(BULK 'C:/out/t.dat',
+        FORMATFILE = 'C:/out/t.fmt', CODEPAGE = '65001') AS rows;
+
+    :param1 table_name: str
+    :param2 column_names: List[str]
+    :param3 data_file: str
+    :param4 format_file: str
+
+    :return: str
+    '''
+
+    columns = ', '.join(column_names)
+
+    return ('INSERT INTO ' + table_name + ' WITH (TABLOCK) (' + columns + ') SELECT ' + columns +
+            " FROM OPENROWSET(BULK '" + data_file.replace("'", "''") +
+            "', FORMATFILE = '" + format_file.replace("'", "''") +
+            "', CODEPAGE = '" + BULK_CODE_PAGE + "') AS rows;")
+
+
+def writeBulkFiles(worksheet, title, directory, report, server_directory=None, chunk_size=SCRIPT_CHUNK_ROWS):
+    '''Writes the data file and format file of an insert worksheet to the
+    directory, chunk_size rows at a time, and creates the statement that
+    loads them. The statement reads the files from server_directory if it
+    is passed, for when the SQL Server sees the directory under another path.
+    Returns None for worksheets that are not insert worksheets and for
+    worksheets with a value that cannot be written as its column's type,
+    which is added to the validation report.
+
+    :param1 worksheet: excel_reader.Worksheet
+    :param2 title: str
+    :param3 directory: str
+    :param4 report: validation_report.ValidationReport
+    :param5 server_directory: str
+    :param6 chunk_size: int
+
+    :return: BulkFiles
+    '''
+
+    statement_plan = script_generator.StatementPlan(worksheet)
+    if statement_plan.script_type not in BULK_SCRIPT_TYPES:
+        return None
+
+    data = statement_plan.getDataRows(worksheet)
+    if not statement_plan.validateParameterValues(data, report, title):
+        return None
+
+    file_name = getBulkFileName(title)
+    data_file = os.path.join(directory, file_name + '.dat')
+    format_file = os.path.join(directory, file_name + '.fmt')
+
+    # newlines are written exactly as the terminators in the format file
+    with open(data_file, 'w', encoding='utf-8', newline='') as f:
+        for start, chunk in zip(range(0, len(data), chunk_size), script_generator.splitDataRows(data, chunk_size)):
+            f.writelines(formatBulkRows(statement_plan, chunk, title, start))
+    with open(format_file, 'w', newline='') as f:
+        f.write(createFormatFile(statement_plan))
+
+    if server_directory is None:
+        server_directory = os.path.abspath(directory)
+    statement = createBulkInsertStatement(statement_plan.table_name, [column[1] for column in statement_plan.parameter_columns],
+                                          os.path.join(server_directory, file_name + '.dat'),
+                                          os.path.join(server_directory, file_name + '.fmt'))
+
+    return BulkFiles(title, data_file, format_file, statement, len(data))
+
+
+def writeWorkbookBulkFiles(workbook, worksheets, directory, report, server_directory=None, chunk_size=SCRIPT_CHUNK_ROWS):
+    '''Writes the bulk load files of each of the passed in insert worksheets to
+    the directory and a "bulk_insert.sql" file with the statements
+    that load them, in the order of the worksheets. Worksheets that are not
+    insert worksheets, or have values that cannot be written, are skipped.
+
+    :param1 workbook: dict
+    :param2 worksheets: List[str]
+    :param3 directory: str
+    :param4 report: validation_report.ValidationReport
+    :param5 server_directory: str
+    :param6 chunk_size: int
+
+    :return: List[BulkFiles]
+    '''
+
+    results = []
+    for worksheet in worksheets:
+        bulk_files = writeBulkFiles(
+            workbook[worksheet], worksheet, directory, report, server_directory, chunk_size)
+        if bulk_files is not None:
+            results.append(bulk_files)
+
+    if len(results) > 0:
+        with open(os.path.join(directory, 'bulk_insert.sql'), 'w') as f:
+            f.writelines(bulk_files.statement + '\n' for bulk_files in results)
+
+    return results
+
+
+def formatBulkFiles(results):
+    '''Formats the rows written for each worksheet with one line per worksheet.
+    ex. "Sheet1: 20000 rows written to 'C:/out/Sheet1.dat'"
+
+    :param1 results: List[BulkFiles]
+
+    :return: str
+    '''
+
+    return '\n'.join([result.title + ': ' + str(result.rows) + " rows written to '" + result.data_file + "'"
+                      for result in results])
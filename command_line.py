@@ -0,0 +1,489 @@
+'''
+Module of 'excel.py' that runs the program from the command line without the
+GUI, so it can be used in scheduled jobs on machines with no display. Nothing
+imported by this module imports tkinter.
+
+ex. python excel.py scripts --input a.xlsx --validate generic --output out.sql
+    python excel.py validate --input a.xlsx --validate sql --database Plant --report errors.csv
+    python excel.py template --output template.xlsx
+    python excel.py execute --input a.xlsx --database Plant
+    python excel.py bulk --input a.xlsx --output C:/bulk
+Matt Saffert
+1-20-2020
+'''
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import bulk_export
+import excel_global
+import excel_reader
+import parallel_worksheets
+import script_generator
+import sql_executor
+from validation_report import ValidationReport
+from excel_constants import *
+
+
+def main(argv):
+    '''Parses the command line arguments and runs the chosen mode of the program.
+    Returns the exit code of the program.
+
+    :param1 argv: List[str]
+
+    :return: int
+    '''
+
+    args = createArgumentParser().parse_args(argv)
+
+    # connections opened by the mode are closed as soon as it finishes
+    with excel_global.sql_connection_pool:
+        if args.mode == 'scripts':
+            return scriptsMode(args)
+        elif args.mode == 'validate':
+            return validateMode(args)
+        elif args.mode == 'template':
+            return templateMode(args)
+        elif args.mode == 'execute':
+            return executeMode(args)
+        elif args.mode == 'bulk':
+            return bulkMode(args)
+
+
+def createArgumentParser():
+    '''Creates the parser for the command line arguments of each mode.
+
+    :return: argparse.ArgumentParser
+    '''
+
+    parser = argparse.ArgumentParser(
+        prog='excel.py', description='Build SQL scripts from data in an Excel spreadsheet.')
+    modes = parser.add_subparsers(dest='mode', required=True)
+
+    scripts = modes.add_parser(
+        'scripts', help='write SQL scripts for a workbook to a ".sql" or ".xlsx" file')
+    addInputArguments(scripts)
+    scripts.add_argument('--output', required=True,
+                         help='".sql" file to write the scripts to, or ".xlsx" file to write the workbook with a scripts column to')
+    scripts.add_argument('--buffer-size', type=positiveInteger, default=SQL_WRITE_BUFFER_SIZE,
+                         help='number of characters of scripts buffered before they are written to a ".sql" file')
+    scripts.add_argument('--script-workers', type=positiveInteger, default=SCRIPT_WORKERS,
+                         help='number of processes rendering the chunks of rows of a single worksheet at the same time')
+    scripts.add_argument('--batch-rows', type=positiveInteger, default=BATCH_ROWS,
+                         help='number of rows written by each INSERT, UPDATE, DELETE or SELECT statement in a ".sql" file (at most ' + str(SQL_MAX_INSERT_ROWS) + ')')
+    scripts.add_argument('--transaction-batches', type=nonNegativeInteger, default=TRANSACTION_BATCHES,
+                         help='number of statements of a worksheet wrapped in each transaction of a ".sql" file. 0 writes no transactions')
+    scripts.add_argument('--parameterized', action='store_true',
+                         help='write each row to a ".sql" file as an sp_executesql call of the same parameterized statement')
+
+    validate = modes.add_parser(
+        'validate', help='check if a workbook is valid for writing scripts')
+    addInputArguments(validate)
+
+    execute = modes.add_parser(
+        'execute', help='run the scripts of a workbook directly against a SQL database')
+    addInputArguments(execute)
+    execute.add_argument('--batch-rows', type=positiveInteger, default=EXECUTE_BATCH_ROWS,
+                         help='number of rows sent to the database in each batch')
+    execute.add_argument('--transaction-batches', type=nonNegativeInteger, default=EXECUTE_TRANSACTION_BATCHES,
+                         help='number of batches executed in each transaction. 0 commits each worksheet once at the end')
+    execute.add_argument('--sqlite',
+                         help='SQLite database file to run the scripts against instead of SQL Server, for testing')
+
+    bulk = modes.add_parser(
+        'bulk', help='write the insert worksheets of a workbook as bulk load files and the statements that load them')
+    addInputArguments(bulk)
+    bulk.add_argument('--output', required=True,
+                      help='directory to write the data files, format files and "bulk_insert.sql" file to')
+    bulk.add_argument('--server-directory',
+                      help='path of the output directory as seen by the SQL Server, if it is not the same')
+
+    template = modes.add_parser(
+        'template', help='build an Excel template, generic or from an existing SQL table')
+    template.add_argument('--output', required=True,
+                          help='".xlsx" file to save the template to')
+    template.add_argument('--server', default=SQL_SERVER_NAME,
+                          help='SQL Server instance where the database is located')
+    template.add_argument('--database',
+                          help='database of the SQL table. A generic template is built if no table is given')
+    template.add_argument('--table', help='SQL table to build the template from')
+    template.add_argument('--script-type', choices=TYPE_OF_SCRIPTS_AVAILABLE, default='insert',
+                          help='type of scripts the template is for')
+    template.add_argument('--include', default='',
+                          help='comma separated columns to put in the include row')
+    template.add_argument('--where', default='',
+                          help='comma separated columns to put in the where row')
+    addSchemaArguments(template)
+
+    return parser
+
+
+def addInputArguments(parser):
+    '''Adds the arguments used to read and validate a workbook.
+
+    :param1 parser: argparse.ArgumentParser
+
+    :return: NONE
+    '''
+
+    parser.add_argument('--input', required=True,
+                        help='Excel workbook to read')
+    parser.add_argument('--validate', choices=['generic', 'sql'], default='generic',
+                        help='validate the workbook generically or against the SQL tables')
+    parser.add_argument('--server', default=SQL_SERVER_NAME,
+                        help='SQL Server instance used by SQL validation')
+    parser.add_argument('--database',
+                        help='database used by SQL validation')
+    parser.add_argument('--chunk-size', type=positiveInteger, default=READ_CHUNK_ROWS,
+                        help='number of rows read from a worksheet at a time')
+    parser.add_argument('--report',
+                        help='".csv" or ".json" file to save the validation errors to')
+    parser.add_argument('--workers', type=positiveInteger, default=WORKSHEET_WORKERS,
+                        help='number of worksheets processed at the same time, each in its own process')
+    addSchemaArguments(parser)
+
+
+def positiveInteger(value):
+    '''Parses a command line count that must be at least 1.
+
+    :param1 value: str
+
+    :return: int
+    '''
+
+    number = parseInteger(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            value + ' is not a positive integer')
+
+    return number
+
+
+def nonNegativeInteger(value):
+    '''Parses a command line count that may be 0.
+
+    :param1 value: str
+
+    :return: int
+    '''
+
+    number = parseInteger(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(
+            value + ' is not a non-negative integer')
+
+    return number
+
+
+def parseInteger(value):
+    '''Parses a command line integer.
+
+    :param1 value: str
+
+    :return: int
+    '''
+
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(value + ' is not an integer')
+
+
+def addSchemaArguments(parser):
+    '''Adds the arguments used to load the design of SQL tables.
+
+    :param1 parser: argparse.ArgumentParser
+
+    :return: NONE
+    '''
+
+    parser.add_argument('--refresh-schema', action='store_true',
+                        help='query the design of every SQL table again instead of using the schema cache')
+    parser.add_argument('--offline', action='store_true',
+                        help='use the last cached design of the SQL tables without connecting to SQL Server')
+
+
+def getValidation(args):
+    '''Gets the validation chosen on the command line and the server and
+    database used by SQL validation.
+
+    :param1 args: argparse.Namespace
+
+    :return: str, Tuple[str, str]
+    '''
+
+    if args.validate == 'sql':
+        if args.database is None:
+            sys.exit('excel.py: error: --database is required for SQL validation')
+        return 'SQL', (args.server, args.database)
+
+    return 'Generic', None
+
+
+def loadSQLSchema(args, sql_database):
+    '''Loads the design of every table in the input workbook, from the schema
+    cache or with one query, into the schema catalog of the database used by
+    SQL validation.
+
+    :param1 args: argparse.Namespace
+    :param2 sql_database: Tuple[str, str]
+
+    :return: schema_catalog.SchemaCatalog
+    '''
+
+    if sql_database is None:
+        return None
+
+    return excel_global.loadSchemaCatalog(sql_database[0], sql_database[1], excel_reader.getTableNames(args.input),
+                                          args.refresh_schema, args.offline)
+
+
+def createWorksheetValidator(args, report):
+    '''Creates the function used to validate each worksheet with the validation
+    chosen on the command line. Worksheets validated with SQL are checked
+    against the schema catalog of every table in the workbook.
+
+    :param1 args: argparse.Namespace
+    :param2 report: validation_report.ValidationReport
+
+    :return: function
+    '''
+
+    validate_with_sql, sql_database = getValidation(args)
+    sql_schema = loadSQLSchema(args, sql_database)
+
+    def validateWorksheet(worksheet, title):
+        return excel_global.validateWorksheet(worksheet, validate_with_sql, title, report, None, sql_schema)
+
+    return validateWorksheet
+
+
+def outputReport(args, report):
+    '''Prints the validation errors and saves them to the report file if one
+    was given.
+
+    :param1 args: argparse.Namespace
+    :param2 report: validation_report.ValidationReport
+
+    :return: NONE
+    '''
+
+    if report.hasErrors():
+        report.printReport(sys.stderr)
+    if args.report is not None:
+        report.saveReport(args.report)
+
+
+def scriptsMode(args):
+    '''Writes the scripts for every valid worksheet of the input workbook. A ".sql"
+    output is streamed from the workbook a chunk of rows at a time.
+
+    :param1 args: argparse.Namespace
+
+    :return: int
+    '''
+
+    report = ValidationReport()
+    if args.workers > 1:
+        return scriptsModeParallel(args, report)
+    validate_worksheet = createWorksheetValidator(args, report)
+
+    if args.output.lower().endswith('.xlsx'):
+        workbook = excel_reader.readWorkbook(args.input)
+        any_valid_sheets = False
+        for worksheet in workbook:
+            if validate_worksheet(workbook[worksheet], worksheet):
+                script_generator.addScriptsColumn(
+                    workbook[worksheet], workers=args.script_workers)
+                any_valid_sheets = True
+        if any_valid_sheets:
+            excel_reader.writeWorkbook(workbook, args.output)
+            print("Scripts saved to: '" + args.output + "'")
+    else:
+        with open(args.output, 'w') as f:
+            scripts_written = script_generator.writeBufferedScripts(f, script_generator.iterateWorkbookFileScripts(
+                args.input, validate_worksheet, report, args.chunk_size, workers=args.script_workers,
+                batch_rows=args.batch_rows, transaction_batches=args.transaction_batches, parameterized=args.parameterized), args.buffer_size)
+        print(str(scripts_written) +
+              " scripts saved to: '" + args.output + "'")
+
+    outputReport(args, report)
+
+    return 1 if report.hasErrors() else 0
+
+
+def scriptsModeParallel(args, report):
+    '''Writes the scripts for every valid worksheet of the input workbook with
+    args.workers worksheets processed at the same time. A ".sql" output is
+    streamed by each worker to a temporary file and the files are joined in
+    the order of the worksheets.
+
+    :param1 args: argparse.Namespace
+    :param2 report: validation_report.ValidationReport
+
+    :return: int
+    '''
+
+    validate_with_sql, sql_database = getValidation(args)
+    loadSQLSchema(args, sql_database)  # workers are given the loaded schema catalog
+
+    if args.output.lower().endswith('.xlsx'):
+        workbook = excel_reader.readWorkbook(args.input)
+        results = parallel_worksheets.processWorkbook(
+            workbook, list(workbook), validate_with_sql, report, args.workers, sql_database)
+        for result in results:
+            if result.valid:
+                script_generator.setScriptsColumn(
+                    workbook[result.title], result.scripts)
+        if any(result.valid for result in results):
+            excel_reader.writeWorkbook(workbook, args.output)
+            print("Scripts saved to: '" + args.output + "'")
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            results = parallel_worksheets.processWorkbookFile(args.input, excel_reader.getSheetNames(args.input), validate_with_sql, report, args.workers,
+                                                              sql_database, args.chunk_size, directory, args.buffer_size, args.batch_rows, args.transaction_batches, args.parameterized)
+            with open(args.output, 'w') as f:
+                script_generator.writeBufferedScripts(
+                    f, parallel_worksheets.iterateScriptFiles(results), args.buffer_size)
+        print(str(sum(result.scripts_written for result in results)) +
+              " scripts saved to: '" + args.output + "'")
+
+    print(parallel_worksheets.formatWorksheetTimings(results))
+    outputReport(args, report)
+
+    return 1 if report.hasErrors() else 0
+
+
+def validateMode(args):
+    '''Validates every worksheet of the input workbook a chunk of rows at a time,
+    with args.workers worksheets validated at the same time.
+
+    :param1 args: argparse.Namespace
+
+    :return: int
+    '''
+
+    report = ValidationReport()
+    if args.workers > 1:
+        validate_with_sql, sql_database = getValidation(args)
+        loadSQLSchema(args, sql_database)  # workers are given the loaded schema catalog
+        results = parallel_worksheets.processWorkbookFile(args.input, excel_reader.getSheetNames(
+            args.input), validate_with_sql, report, args.workers, sql_database, args.chunk_size)
+        print(parallel_worksheets.formatWorksheetTimings(results))
+        any_valid_sheets = any(result.valid for result in results)
+        all_valid_sheets = all(result.valid for result in results)
+    else:
+        any_valid_sheets, all_valid_sheets = excel_global.validateWorkbookFile(
+            args.input, createWorksheetValidator(args, report), report, args.chunk_size)
+
+    if all_valid_sheets:
+        print("SUCCESS. All sheets have been successfully validated.")
+    elif not any_valid_sheets:
+        print("FAILURE. No sheets could be successfully validated. Please review rules.")
+    else:  # some but not all spreadsheets in workbook pass validation
+        print("CAUTION. Care must be taken building scripts with this workbook because not all sheets are in a valid form.")
+
+    outputReport(args, report)
+
+    return 0 if all_valid_sheets else 1
+
+
+def executeMode(args):
+    '''Executes the scripts of every valid worksheet of the input workbook
+    against the database, a batch of rows at a time.
+
+    :param1 args: argparse.Namespace
+
+    :return: int
+    '''
+
+    if args.sqlite is not None:
+        executor = sql_executor.SqliteExecutor(sqlite3.connect(args.sqlite))
+    else:
+        if args.database is None:
+            sys.exit('excel.py: error: --database or --sqlite is required to execute scripts')
+        tables, cursor = excel_global.connectToSQLDatabase(
+            args.server, args.database)
+        executor = sql_executor.PyodbcExecutor(cursor.connection)
+
+    report = ValidationReport()
+    validate_worksheet = createWorksheetValidator(args, report)
+    workbook = excel_reader.readWorkbook(args.input)
+    valid_worksheets = [worksheet for worksheet in workbook
+                        if validate_worksheet(workbook[worksheet], worksheet)]
+
+    results = sql_executor.executeWorkbook(
+        executor, workbook, valid_worksheets, report, args.batch_rows, args.transaction_batches)
+    if args.sqlite is not None:  # SQL Server connections are closed with the pool
+        executor.connection.close()
+    print(sql_executor.formatExecutionResults(results))
+
+    outputReport(args, report)
+
+    return 1 if report.hasErrors() else 0
+
+
+def bulkMode(args):
+    '''Writes the bulk load files of every valid insert worksheet of the input
+    workbook to the output directory.
+
+    :param1 args: argparse.Namespace
+
+    :return: int
+    '''
+
+    report = ValidationReport()
+    validate_worksheet = createWorksheetValidator(args, report)
+    workbook = excel_reader.readWorkbook(args.input)
+    valid_worksheets = [worksheet for worksheet in workbook
+                        if validate_worksheet(workbook[worksheet], worksheet)]
+
+    try:
+        results = bulk_export.writeWorkbookBulkFiles(
+            workbook, valid_worksheets, args.output, report, args.server_directory, args.chunk_size)
+    except ValueError as e:  # a value cannot be written to a data file
+        sys.exit('excel.py: error: ' + str(e))
+    print(bulk_export.formatBulkFiles(results))
+
+    outputReport(args, report)
+
+    return 1 if report.hasErrors() else 0
+
+
+def templateMode(args):
+    '''Builds a template from a SQL table, or a generic template if no table is
+    given, and saves it to the output file.
+
+    :param1 args: argparse.Namespace
+
+    :return: int
+    '''
+
+    if args.table is None:  # generates a generic template with default table data
+        workbook = excel_global.createGenericTemplate()
+    else:  # generates an Excel template from a SQL database
+        if args.database is None:
+            sys.exit('excel.py: error: --database is required to build a template from a table')
+        sql_schema = excel_global.loadSchemaCatalog(
+            args.server, args.database, [args.table], args.refresh_schema, args.offline)
+        if not sql_schema.hasTable(args.table):
+            sys.exit('excel.py: error: table ' + args.table +
+                     ' not found in database ' + args.database)
+        sql_column_names, sql_column_types, column_is_nullable, column_is_identity = sql_schema.getTableInfo(
+            args.table)
+
+        include_columns = [name for name in args.include.split(',') if name]
+        where_columns = [name for name in args.where.split(',') if name]
+        sql_include_row = [1 if name in include_columns else 0
+                           for name in sql_column_names]
+        sql_where_row = [1 if name in where_columns else 0
+                         for name in sql_column_names]
+
+        workbook = {args.table: excel_global.createTemplateWorksheet(
+            args.table, args.script_type, sql_column_names, sql_column_types, sql_include_row, sql_where_row)}
+
+    excel_reader.writeWorkbook(workbook, args.output)
+    print("Template saved to: '" + args.output + "'")
+
+    return 0
@@ -25,7 +25,7 @@ def templateMode():
 
     elif template_type == 'generic':  # generates a generic template with default table data
         # dictionary filled with generic data to build template
-        workbook = {'IOChannels': pd.DataFrame(data=GENERIC_TEMPLATE)}
+        workbook = excel_global.createGenericTemplate()
 
     else:
         gui.closeProgram()
@@ -174,46 +174,6 @@ def populateClauses(sql_table_name, sql_column_names, column_is_nullable, column
     return sql_include_row, sql_where_row, disable_include_change
 
 
-def WriteTemplateToSheet(worksheet, sql_column_names, sql_column_types, sql_include_row, sql_where_row, disable_include_change):
-    '''Based on user input from previous functions, this function will write the
-    template to the Excel workbook.
-
-    :param1 worksheet: pandas.core.frame.DataFrame
-    :param2 sql_column_names: List[str]
-    :param3 sql_column_types: List[str]
-    :param4 sql_include_row: List[int]
-    :param5 sql_where_row: List[int]
-    :param6 disable_include_change: List[int]
-
-    :return: NONE
-    '''
-
-    # populates top info row
-    worksheet.iloc[INFO_ROW][TABLE_NAME] = sql_table_name
-    worksheet.iloc[INFO_ROW][SCRIPT_TYPE] = script_type
-
-    # populates next 4 rows in the Excel template with data from column lists
-    for i in range(len(sql_column_names)):
-        worksheet.iloc[COLUMN_NAMES_ROW_INDEX][i] = sql_column_names[i]
-        worksheet.iloc[COLUMN_DATA_TYPE_ROW_INDEX][i] = sql_column_types[i]
-        if len(sql_include_row) > 0:  # only put data in include row if there is data
-            if sql_include_row[i] == 1:
-                worksheet.iloc[INCLUDE_ROW_INDEX][i] = 'include'
-            # if the cell shouldn't be changed, color it red
-            if disable_include_change[i] == 1:
-                worksheet.iloc[INCLUDE_ROW_INDEX][i] = worksheet.iloc[INCLUDE_ROW_INDEX][i].upper(
-                )
-        else:  # if script is delete, there should be no include. color it red
-            worksheet.iloc[INCLUDE_ROW_INDEX][i] = worksheet.iloc[INCLUDE_ROW_INDEX][i].upper(
-            )
-        if len(sql_where_row) > 0:  # only put data in where row if there is data
-            if sql_where_row[i] == 1:
-                worksheet.iloc[WHERE_ROW_INDEX][i] = 'where'
-        else:  # if script is insert, there should be no where clause. color it red
-            worksheet.iloc[INCLUDE_ROW_INDEX][i] = worksheet.iloc[INCLUDE_ROW_INDEX][i].upper(
-            )
-
-
 def getTypeOfScriptFromUser(worksheet_title):
     '''Creates a tkinter dialog box that asks the user to choose the type of scripts
     they are trying to generate
@@ -290,8 +250,9 @@ def getTemplateInfo():
     sql_table_name = gui.createDropDownBox(
         description, label, sql_tables)
 
-    sql_column_names, sql_column_types, column_is_nullable, column_is_identity = excel_global.getSQLTableInfo(
-        sql_table_name, cursor)
+    # the design of the table is read from the schema cache unless it has changed
+    sql_column_names, sql_column_types, column_is_nullable, column_is_identity = excel_global.loadSchemaCatalog(
+        SQL_SERVER_NAME, sql_database_name, [sql_table_name]).getTableInfo(sql_table_name)
 
     return sql_column_names, sql_column_types, column_is_nullable, column_is_identity, sql_table_name
 
@@ -331,8 +292,6 @@ def templateModeSQL():
 
     # tkinter dialog boxes
     sql_column_names, sql_column_types, column_is_nullable, column_is_identity, sql_table_name = getTemplateInfo()
-    workbook = {sql_table_name: pd.DataFrame()}
-    worksheet = workbook[sql_table_name]
 
     # allows user to select the type of script this template is for
     script_type = getTypeOfScriptFromUser(
@@ -343,8 +302,8 @@ def templateModeSQL():
         sql_table_name, sql_column_names, column_is_nullable, column_is_identity, script_type)  # tkinter dialog boxes
 
     # writes the generated template to the new Excel workbook
-    WriteTemplateToSheet(
-        worksheet, sql_column_names, sql_column_types, sql_include_row, sql_where_row, disable_include_change)
+    workbook = {sql_table_name: excel_global.createTemplateWorksheet(
+        sql_table_name, script_type, sql_column_names, sql_column_types, sql_include_row, sql_where_row)}
 
     return workbook
 
@@ -4,12 +4,10 @@ Matt Saffert
 12-31-2019
 '''
 
-import create_excel_template as template
-import write_sql_scripts as write_scripts
-import validate_workbook as validate
-import global_gui as gui
 import sys
 import os
+import command_line
+import excel_global
 from excel_constants import *
 
 
@@ -19,18 +17,26 @@ def main():
     :return: NONE
     '''
 
+    # imported here so the command line mode never imports tkinter
+    import create_excel_template as template
+    import write_sql_scripts as write_scripts
+    import validate_workbook as validate
+    import global_gui as gui
+
     # try:
     # gets the mode of the program that the user would like to use
     program_mode = gui.getProgramMode()
 
-    if program_mode == 'scripts':
-        write_scripts.writeMode()
+    # connections opened by the mode are closed as soon as it finishes
+    with excel_global.sql_connection_pool:
+        if program_mode == 'scripts':
+            write_scripts.writeMode()
 
-    elif program_mode == 'template':
-        template.templateMode()
+        elif program_mode == 'template':
+            template.templateMode()
 
-    elif program_mode == 'validate':
-        validate.validationMode()
+        elif program_mode == 'validate':
+            validate.validationMode()
 
 
 '''
@@ -43,4 +49,9 @@ def main():
         sys.exit()
 '''
 
-main()
+# worker processes import this module again so it must not run the program when imported
+if __name__ == '__main__':
+    if len(sys.argv) > 1:  # command line arguments run the program without the GUI
+        sys.exit(command_line.main(sys.argv[1:]))
+    else:
+        main()
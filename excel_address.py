@@ -0,0 +1,116 @@
+'''
+Module of 'excel.py' that converts between the zero based column and row
+indexes used by pandas and Excel's A1 cell addresses (ex. column 0, row 6 <-> 'A7'),
+for every column up to XFD. Column letters are computed once when the module
+is imported so converting an address is a lookup.
+Matt Saffert
+2-14-2020
+'''
+
+from excel_constants import *
+import functools
+import re
+
+
+def createColumnLetters(column):
+    '''Computes the letters of a column from its index. Columns are numbered in
+    base 26 with the digits A-Z and no zero. ex. 0 -> 'A', 25 -> 'Z', 26 -> 'AA'
+
+    :param1 column: int
+
+    :return: str
+    '''
+
+    letters = ''
+    column += 1
+    while column > 0:
+        column, remainder = divmod(column - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+
+    return letters
+
+
+'''
+Letters of every Excel column by index, and the index of every column by its
+letters
+'''
+COLUMN_LETTERS = tuple(createColumnLetters(column)
+                       for column in range(EXCEL_MAX_COLUMNS))
+COLUMN_INDEXES = {letters: column for column,
+                  letters in enumerate(COLUMN_LETTERS)}
+
+'''
+Pattern of an A1 cell address. ex. 'XFD1048576'
+'''
+CELL_ADDRESS_PATTERN = re.compile(r'^\$?([A-Za-z]{1,3})\$?([0-9]+)$')
+
+
+def getColumnLetters(column):
+    '''Gets the letters of a column from its zero based index.
+    ex. 0 -> 'A', 48 -> 'AW', 16383 -> 'XFD'
+
+    :param1 column: int
+
+    :return: str
+    '''
+
+    if column < 0 or column >= EXCEL_MAX_COLUMNS:
+        raise ValueError('Column ' + str(column) +
+                         ' is outside of an Excel worksheet')
+
+    return COLUMN_LETTERS[column]
+
+
+def getColumnIndex(letters):
+    '''Gets the zero based index of a column from its letters.
+    ex. 'A' -> 0, 'aw' -> 48
+
+    :param1 letters: str
+
+    :return: int
+    '''
+
+    column = COLUMN_INDEXES.get(letters.upper())
+    if column is None:
+        raise ValueError("'" + letters + "' is not an Excel column")
+
+    return column
+
+
+@functools.lru_cache(maxsize=65536)
+def getCellAddress(column, row):
+    '''Gets the A1 address of a cell from its zero based column and row.
+    ex. (6, 6) -> 'G7'
+
+    :param1 column: int
+    :param2 row: int
+
+    :return: str
+    '''
+
+    if row < 0 or row >= EXCEL_MAX_ROWS:
+        raise ValueError('Row ' + str(row) +
+                         ' is outside of an Excel worksheet')
+
+    return getColumnLetters(column) + str(row + 1)
+
+
+def parseCellAddress(address):
+    '''Gets the zero based column and row of a cell from its A1 address.
+    Absolute references are allowed. ex. 'G7' -> (6, 6), '$B$2' -> (1, 1)
+
+    :param1 address: str
+
+    :return: int, int
+    '''
+
+    match = CELL_ADDRESS_PATTERN.match(address.strip())
+    if match is None or int(match.group(2)) < 1:
+        raise ValueError("'" + address + "' is not an Excel cell address")
+
+    column = getColumnIndex(match.group(1))
+    row = int(match.group(2)) - 1
+    if row >= EXCEL_MAX_ROWS:
+        raise ValueError("'" + address + "' is outside of an Excel worksheet")
+
+    return column, row
@@ -4,6 +4,10 @@ Matt Saffert
 12-31-2019
 '''
 
+import collections
+import importlib.util
+import os
+import re
 import numpy as np
 
 
@@ -81,6 +85,153 @@ SQL_OTHER_TYPE = [
     'table'
 ]
 
+'''
+SQL Server binary data types
+'''
+SQL_BINARY_TYPE = [
+    'binary',
+    'varbinary',
+    'image'
+]
+
+'''
+SQL Server Unicode string data types
+'''
+SQL_UNICODE_TYPE = [
+    'nchar',
+    'nvarchar',
+    'ntext'
+]
+
+'''
+Names of every supported SQL Server data type
+'''
+SQL_TYPE_NAMES = frozenset(SQL_STRING_TYPE + SQL_NUMERIC_TYPE +
+                           SQL_DATETIME_TYPE + SQL_OTHER_TYPE)
+
+'''
+Names of the SQL Server data types whose values are quoted in scripts. bit can
+be represented by both 1/0 integers, or 'True'/'False' strings. This program
+uses strings
+'''
+SQL_QUOTED_TYPE_NAMES = frozenset(SQL_STRING_TYPE + SQL_DATETIME_TYPE +
+                                  SQL_OTHER_TYPE + ['bit'])
+
+'''
+Pattern of the length, precision or scale at the end of a SQL type.
+ex. '(200)' in 'varchar(200)'
+'''
+SQL_TYPE_ARGUMENTS_PATTERN = re.compile(r'[\(\[](.*?)[\)\]]')
+
+'''
+A SQL type as declared in the types row of a worksheet, parsed once. name is
+the type as written without its length, precision or scale, and base is name
+in lower case. length is -1 for max. The flags say whether the type is
+supported, whether its values are quoted in scripts and whether it is a
+numeric, binary or Unicode string type.
+ex. ('varchar(50)', 'varchar', 'varchar', 50, None, None, True, True, False, False, False)
+'''
+SqlType = collections.namedtuple('SqlType', ['declared', 'name', 'base', 'length', 'precision', 'scale',
+                                             'supported', 'quoted', 'numeric', 'binary', 'unicode'])
+
+
+def parseSqlType(declared):
+    '''Parses a SQL type into its name, length, precision and scale.
+    ex. 'decimal(10, 2)' -> precision 10, scale 2, 'nvarchar(max)' -> length -1
+
+    :param1 declared: str
+
+    :return: SqlType
+    '''
+
+    name = SQL_TYPE_ARGUMENTS_PATTERN.sub('', declared)
+    base = name.strip().lower()
+    length = precision = scale = None
+
+    match = SQL_TYPE_ARGUMENTS_PATTERN.search(declared)
+    if match is not None:
+        arguments = [argument.strip().lower()
+                     for argument in match.group(1).split(',')]
+        numbers = [int(argument) if argument.isdigit()
+                   else None for argument in arguments]
+        if len(arguments) == 1 and base in SQL_STRING_TYPE:
+            length = -1 if arguments[0] == 'max' else numbers[0]
+        elif len(arguments) == 1 and base in SQL_DATETIME_TYPE:  # fractional seconds
+            scale = numbers[0]
+        elif len(arguments) == 1:
+            precision = numbers[0]
+        elif len(arguments) == 2:
+            precision, scale = numbers
+
+    return SqlType(declared, name, base, length, precision, scale, name in SQL_TYPE_NAMES, name in SQL_QUOTED_TYPE_NAMES,
+                   name in SQL_NUMERIC_TYPE, name in SQL_BINARY_TYPE, name in SQL_UNICODE_TYPE)
+
+
+'''
+Every SQL type that has been parsed, by the type as declared
+'''
+SQL_TYPES = {}
+
+
+def getSqlType(type):
+    '''Gets a SQL type from the registry, parsing it the first time it is seen.
+    Values that are not strings (ex. a blank cell) are looked up as text.
+
+    :param1 type: str
+
+    :return: SqlType
+    '''
+
+    declared = str(type)
+    sql_type = SQL_TYPES.get(declared)
+    if sql_type is None:
+        sql_type = SQL_TYPES[declared] = parseSqlType(declared)
+
+    return sql_type
+
+
+'''
+pandas dtype of data columns of string types. Strings are stored in Arrow
+memory if pyarrow is installed
+'''
+STRING_DTYPE = 'string[pyarrow]' if importlib.util.find_spec(
+    'pyarrow') is not None else 'string'
+
+'''
+pandas dtypes the data columns of each SQL type are cast to when a worksheet is
+read, by the SqlType base name, with the kinds of values
+(see pandas.api.types.infer_dtype()) a column must only hold to be cast.
+Other columns are left as objects
+'''
+DATA_COLUMN_DTYPES = {
+    'bit': ('boolean', ['boolean']),
+    'tinyint': ('Int64', ['integer', 'floating', 'mixed-integer-float']),
+    'smallint': ('Int64', ['integer', 'floating', 'mixed-integer-float']),
+    'int': ('Int64', ['integer', 'floating', 'mixed-integer-float']),
+    'bigint': ('Int64', ['integer', 'floating', 'mixed-integer-float']),
+    'decimal': ('float64', ['floating']),
+    'numeric': ('float64', ['floating']),
+    'smallmoney': ('float64', ['floating']),
+    'money': ('float64', ['floating']),
+    'float': ('float64', ['floating']),
+    'real': ('float64', ['floating']),
+    'char': (STRING_DTYPE, ['string']),
+    'varchar': (STRING_DTYPE, ['string']),
+    'text': (STRING_DTYPE, ['string']),
+    'nchar': (STRING_DTYPE, ['string']),
+    'nvarchar': (STRING_DTYPE, ['string']),
+    'ntext': (STRING_DTYPE, ['string']),
+    'datetime': ('datetime64[ns]', ['datetime', 'datetime64', 'date']),
+    'datetime2': ('datetime64[ns]', ['datetime', 'datetime64', 'date']),
+    'smalldatetime': ('datetime64[ns]', ['datetime', 'datetime64', 'date']),
+    'date': ('datetime64[ns]', ['datetime', 'datetime64', 'date'])
+}
+
+'''
+SQL Server instance that holds the databases used by this program
+'''
+SQL_SERVER_NAME = 'CHA1WS003746\\MSSQLSERVER2016'
+
 '''
 Excel row indexes
 '''
@@ -91,6 +242,11 @@ INCLUDE_ROW_INDEX = 3
 WHERE_ROW_INDEX = 4
 START_OF_DATA_ROWS_INDEX = 5
 
+'''
+Labels of the header rows of a worksheet
+'''
+HEADER_ROW_LABELS = ['info', 'names', 'types', 'include', 'where']
+
 '''
 Info row indexes
 '''
@@ -103,56 +259,143 @@ Types of scripts generatable by this program
 TYPE_OF_SCRIPTS_AVAILABLE = ['insert', 'delete', 'select', 'update']
 
 '''
-Python column index to excel letter column index
-'''
-LETTER_INDEX_DICT = {
-    'A': 0,
-    'B': 1,
-    'C': 2,
-    'D': 3,
-    'E': 4,
-    'F': 5,
-    'G': 6,
-    'H': 7,
-    'I': 8,
-    'J': 9,
-    'K': 10,
-    'L': 11,
-    'M': 12,
-    'N': 13,
-    'O': 14,
-    'P': 15,
-    'Q': 16,
-    'R': 17,
-    'S': 18,
-    'T': 19,
-    'U': 20,
-    'V': 21,
-    'W': 22,
-    'X': 23,
-    'Y': 24,
-    'Z': 25,
-    'AA': 26,
-    'AB': 27,
-    'AC': 28,
-    'AD': 29,
-    'AE': 30,
-    'AF': 31,
-    'AG': 32,
-    'AH': 33,
-    'AI': 34,
-    'AJ': 35,
-    'AK': 36,
-    'AL': 37,
-    'AM': 38,
-    'AN': 39,
-    'AO': 40,
-    'AP': 41,
-    'AQ': 42,
-    'AR': 43,
-    'AS': 44,
-    'AT': 45,
-    'AU': 46,
-    'AV': 47,
-    'AW': 48
+Validation error codes
+'''
+TABLE_NAME_ERROR = 'TABLE_NAME'
+SCRIPT_TYPE_ERROR = 'SCRIPT_TYPE'
+COLUMN_NAME_ERROR = 'COLUMN_NAME'
+DATA_TYPE_ERROR = 'DATA_TYPE'
+DATA_TYPE_MISMATCH_ERROR = 'DATA_TYPE_MISMATCH'
+INCLUDE_ROW_ERROR = 'INCLUDE_ROW'
+INCLUDE_REQUIRED_ERROR = 'INCLUDE_REQUIRED'
+INCLUDE_FORBIDDEN_ERROR = 'INCLUDE_FORBIDDEN'
+WHERE_ROW_ERROR = 'WHERE_ROW'
+MISSING_VALUE_ERROR = 'MISSING_VALUE'
+PARAMETER_VALUE_ERROR = 'PARAMETER_VALUE'
+
+'''
+Number of data rows rendered into scripts at a time when streaming scripts
+'''
+SCRIPT_CHUNK_ROWS = 10000
+
+'''
+Number of processes that render the chunks of data rows of a single worksheet at
+the same time. 1 renders the chunks one after another in the program's process
+'''
+SCRIPT_WORKERS = 1
+
+'''
+Most rows SQL Server allows in the VALUES list of a single INSERT statement
+'''
+SQL_MAX_INSERT_ROWS = 1000
+
+'''
+Most parameters SQL Server allows in a single statement
+'''
+SQL_MAX_PARAMETERS = 2100
+
+'''
+Schema of a SQL table named in cell A1 without one. ex. 'IOChannels' is 'dbo.IOChannels'
+'''
+DEFAULT_SQL_SCHEMA = 'dbo'
+
+'''
+Number of rows written by each INSERT, UPDATE, DELETE or SELECT statement in a
+.sql file. 1 writes one statement per row
+'''
+BATCH_ROWS = 1
+
+'''
+Number of statements of a worksheet written between each BEGIN TRANSACTION and
+COMMIT TRANSACTION in a .sql file. 0 writes the statements without transactions
+'''
+TRANSACTION_BATCHES = 0
+
+'''
+Number of rows sent to the database in each batch when worksheets are executed
+directly against a database
+'''
+EXECUTE_BATCH_ROWS = 1000
+
+'''
+Number of batches executed in each transaction when worksheets are executed
+directly against a database
+'''
+EXECUTE_TRANSACTION_BATCHES = 10
+
+'''
+Number of characters of scripts buffered before they are flushed to a .sql file
+'''
+SQL_WRITE_BUFFER_SIZE = 1048576
+
+'''
+File the design of SQL tables is cached in between runs of the program, so they
+can be validated against without querying SQL Server or while it is offline
+'''
+SCHEMA_CACHE_FILE = os.path.join(
+    os.path.expanduser('~'), '.excel_sql_schema_cache.json')
+
+'''
+Number of seconds the cached design of a table is used without checking whether
+the table has been changed since
+'''
+SCHEMA_CACHE_SECONDS = 3600
+
+'''
+Number of data rows read from a worksheet at a time when streaming a workbook
+'''
+READ_CHUNK_ROWS = 10000
+
+'''
+Number of processes that validate and create scripts for worksheets at the same
+time. 1 processes the worksheets one after another in the program's process
+'''
+WORKSHEET_WORKERS = 1
+
+'''
+Text written between the fields and at the end of each row of the data file of a
+bulk load. Values containing either are not written to the data file
+'''
+BULK_FIELD_TERMINATOR = '\t'
+BULK_ROW_TERMINATOR = '\r\n'
+
+'''
+Version of bcp the non-XML format files of bulk loads are written for
+(14.0 is SQL Server 2017)
+'''
+BULK_FORMAT_VERSION = '14.0'
+
+'''
+Code page the data files of bulk loads are written in. 65001 is UTF-8
+'''
+BULK_CODE_PAGE = '65001'
+
+'''
+Cell text that pandas reads as a missing value
+'''
+EXCEL_NA_VALUES = {
+    '',
+    '#N/A',
+    '#N/A N/A',
+    '#NA',
+    '-1.#IND',
+    '-1.#QNAN',
+    '-NaN',
+    '-nan',
+    '1.#IND',
+    '1.#QNAN',
+    '<NA>',
+    'N/A',
+    'NA',
+    'NULL',
+    'NaN',
+    'n/a',
+    'nan',
+    'null'
 }
+
+'''
+Number of columns and rows of an Excel worksheet. The last cell is XFD1048576
+'''
+EXCEL_MAX_COLUMNS = 16384
+EXCEL_MAX_ROWS = 1048576
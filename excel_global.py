@@ -4,190 +4,267 @@ Matt Saffert
 1-9-2020
 '''
 
+import atexit
 import pyodbc
-import re
 from excel_constants import *
 import subprocess
 import sys
+import numpy as np
 import pandas as pd
-import global_gui as gui
+import excel_address
+import excel_reader
+from schema_catalog import SchemaCatalog, SchemaCache, createColumnIndex
 
 
-def validateData(worksheet):
+def validateData(worksheet, report, title, row_offset=0):
     '''Validates the data in the passed in worksheet. The data comes from the 6th
-    row and on in an Excel spreadsheet
+    row and on in an Excel spreadsheet. row_offset is the number of data rows
+    that come before the passed in worksheet when it is a chunk of a larger one.
+    Errors are added to the validation report.
 
-    :param1 worksheet: pandas.core.frame.DataFrame
+    :param1 worksheet: excel_reader.Worksheet
+    :param2 report: validation_report.ValidationReport
+    :param3 title: str
+    :param4 row_offset: int
 
     :return: bool
     '''
 
     valid_template = True
-    skip_remaining_errors = False
 
-    for row in range(START_OF_DATA_ROWS_INDEX, len(worksheet) - 1):
-        for i in range(len(worksheet.loc['info'])):
-            if pd.isnull(worksheet.iloc[row][i]) and (worksheet.loc['include'][i] == 'include' or worksheet.loc['where'][i] == 'where'):
-                valid_template = False
-                skip_remaining_errors = gui.createInvalidCellBox(
-                    'You have not entered a value in cell ' + getExcelCellToInsertInto(i, row) + ' where one is required')
-                if skip_remaining_errors:
-                    return valid_template
-    blank_last_row = True
-    for i in range(len(worksheet.iloc[len(worksheet) - 1])):
-        if not (pd.isnull(worksheet.iloc[len(worksheet) - 1][i])):
-            blank_last_row = False
-    if not blank_last_row:
-        for i in range(len(worksheet.iloc[len(worksheet) - 1])):
-            if pd.isnull(worksheet.iloc[len(worksheet) - 1][i]) and (worksheet.loc['include'][i] == 'include' or worksheet.loc['where'][i] == 'where'):
-                valid_template = False
-                skip_remaining_errors = gui.createInvalidCellBox(
-                    'You have not entered a value in cell ' + getExcelCellToInsertInto(i, len(worksheet) - 1) + ' where one is required')
-                if skip_remaining_errors:
-                    return valid_template
+    # blank rows at the end of the worksheet are dropped by the reader, so every
+    # row is validated. (the last row of a chunk is not the end of the worksheet)
+    header_rows, data = worksheet
+
+    # columns that need a value in every row of data. (included or in where clause)
+    required_columns = np.flatnonzero(((header_rows.loc['include'] == 'include') | (
+        header_rows.loc['where'] == 'where')).to_numpy())
+    missing_values = data.iloc[:, required_columns].isna().to_numpy()
+
+    # row and column of each required cell that has no value, in row order
+    missing_rows, missing_columns = np.nonzero(missing_values)
+
+    for row, column in zip(missing_rows, required_columns[missing_columns]):
+        valid_template = False
+        excel_cell = getExcelCellToInsertInto(
+            column, row + START_OF_DATA_ROWS_INDEX + row_offset)
+        report.addError(MISSING_VALUE_ERROR, title, excel_cell,
+                        'You have not entered a value in cell ' + excel_cell + ' where one is required')
 
     return valid_template
 
 
-def validateWorksheetSQL(worksheet):
+def validateWorksheetSQL(worksheet, report, title, sql_connection=None, schema_catalog=None):
     '''Validates the data in the passed in worksheet based on a SQL table from an
-    open SQL connection.
-
-    :param1 worksheet: pandas.core.frame.DataFrame
+    open SQL connection. Errors are added to the validation report. If no
+    (tables, cursor) connection or schema catalog is passed in, the user is
+    asked to choose a database and the catalog of that database is used. A
+    schema catalog is used instead of querying the table's design, and with no
+    connection it is the only source of tables.
+
+    :param1 worksheet: excel_reader.Worksheet
+    :param2 report: validation_report.ValidationReport
+    :param3 title: str
+    :param4 sql_connection: tuple
+    :param5 schema_catalog: schema_catalog.SchemaCatalog
 
     :return: bool
     '''
 
     valid_template = True
-
-    tables, cursor, sql_database_name = connectToSQLServer()
-    if worksheet.loc['info'][0] == None or worksheet.loc['info'][0] not in tables:
+    header_rows = worksheet.header_rows
+
+    cursor = None
+    if sql_connection is not None:
+        tables, cursor = sql_connection
+    elif schema_catalog is None:
+        tables, cursor, sql_database_name = connectToSQLServer()
+        schema_catalog = sql_connection_pool.getSchemaCatalog(
+            SQL_SERVER_NAME, sql_database_name)
+    if schema_catalog is not None:
+        if cursor is not None:  # only queries the table if it has not been looked up yet
+            schema_catalog.load(cursor, [header_rows.loc['info'][0]])
+        table_exists = schema_catalog.hasTable(header_rows.loc['info'][0])
+    else:
+        table_exists = header_rows.loc['info'][0] in tables
+    if header_rows.loc['info'][0] == None or not table_exists:
         valid_template = False
-        gui.createPopUpBox(
-            'You have not specified a valid SQL table name in cell "A1"')
-        gui.createPopUpBox(
-            'Cannot continue SQL validation.')
+        report.addError(TABLE_NAME_ERROR, title, 'A1',
+                        'You have not specified a valid SQL table name in cell "A1". Cannot continue SQL validation.')
         return valid_template
 
-    if worksheet.loc['info'][1] not in TYPE_OF_SCRIPTS_AVAILABLE:
+    if header_rows.loc['info'][1] not in TYPE_OF_SCRIPTS_AVAILABLE:
         valid_template = False
-        gui.createPopUpBox(
-            'You have not specified a valid script type in cell "B1"')
-
-    sql_column_names, sql_column_types, column_is_nullable, column_is_identity = getSQLTableInfo(
-        worksheet.loc['info'][0], cursor)
-
-    for i in range(len(worksheet.loc['names'])):
-        if (worksheet.loc['names'][i] == None or worksheet.loc['names'][i] not in sql_column_names) and (worksheet.loc['include'][i] == 'include' or worksheet.loc['where'][i] == 'where'):
+        report.addError(SCRIPT_TYPE_ERROR, title, 'B1',
+                        'You have not specified a valid script type in cell "B1"')
+
+    # columns of the SQL table by name, so the spreadsheet's columns may be in any order
+    if schema_catalog is not None:
+        sql_columns = schema_catalog.getColumnIndex(header_rows.loc['info'][0])
+    else:
+        sql_columns = createColumnIndex(
+            header_rows.loc['info'][0], *getSQLTableInfo(header_rows.loc['info'][0], cursor))
+
+    # header rows are read once instead of looking up each cell
+    column_names = list(header_rows.loc['names'])
+    column_types = list(header_rows.loc['types'])
+    include_row = list(header_rows.loc['include'])
+    where_row = list(header_rows.loc['where'])
+    script_type = header_rows.loc['info'][1]
+
+    for i in range(len(column_names)):
+        if (column_names[i] == None or column_names[i] not in sql_columns) and (include_row[i] == 'include' or where_row[i] == 'where'):
             valid_template = False
-            gui.createPopUpBox(
-                'You have not entered a column name where one is required in cell ' + getExcelCellToInsertInto(i, COLUMN_NAMES_ROW_INDEX))
-
-    for i in range(len(worksheet.loc['types'])):
-        type = re.sub("[\(\[].*?[\)\]]", "", str(worksheet.loc['types'][i]))
-        if type not in SQL_STRING_TYPE and type not in SQL_NUMERIC_TYPE and type not in SQL_DATETIME_TYPE and type not in SQL_OTHER_TYPE:
-            if (worksheet.loc['include'][i] == 'include' or worksheet.loc['where'][i] == 'where'):
+            excel_cell = getExcelCellToInsertInto(i, COLUMN_NAMES_ROW_INDEX)
+            report.addError(COLUMN_NAME_ERROR, title, excel_cell,
+                            'You have not entered a column name where one is required in cell ' + excel_cell)
+
+    for i in range(len(column_types)):
+        sql_type = getSqlType(column_types[i])
+        excel_cell = getExcelCellToInsertInto(i, COLUMN_DATA_TYPE_ROW_INDEX)
+        if not sql_type.supported:
+            if (include_row[i] == 'include' or where_row[i] == 'where'):
                 valid_template = False
-                gui.createPopUpBox(
-                    'You have not entered a supported SQL type where one is required in cell ' + getExcelCellToInsertInto(i, COLUMN_DATA_TYPE_ROW_INDEX))
-        column_name = worksheet.loc['names'][i]
-        if column_name in sql_column_names:
-            sql_name_index = sql_column_names.index(column_name)
-            if type != sql_column_types[sql_name_index]:
+                report.addError(DATA_TYPE_ERROR, title, excel_cell,
+                                'You have not entered a supported SQL type where one is required in cell ' + excel_cell)
+        column_name = column_names[i]
+        if column_name in sql_columns:
+            if sql_type.name != sql_columns[column_name].type:
                 valid_template = False
-                gui.createPopUpBox(
-                    'The type in your spreadsheet for ' + column_name + ', does not match the type of the column in SQL in cell ' + getExcelCellToInsertInto(i, COLUMN_DATA_TYPE_ROW_INDEX))
+                report.addError(DATA_TYPE_MISMATCH_ERROR, title, excel_cell, 'The type in your spreadsheet for ' + column_name +
+                                ', does not match the type of the column in SQL in cell ' + excel_cell)
 
-    for i in range(len(worksheet.loc['include'])):
-        if worksheet.loc['include'][i] != None and worksheet.loc['include'][i] != 'include':
+    for i in range(len(include_row)):
+        excel_cell = getExcelCellToInsertInto(i, INCLUDE_ROW_INDEX)
+        if include_row[i] != None and include_row[i] != 'include':
             valid_template = False
-            gui.createPopUpBox(
-                'You have not entered an valid string in cell ' + getExcelCellToInsertInto(i, INCLUDE_ROW_INDEX) + '. Valid string for row 4 is "include" or leave blank')
-        if worksheet.loc['info'][1] != 'delete':
-            if column_is_identity[i] == 0:
+            report.addError(INCLUDE_ROW_ERROR, title, excel_cell, 'You have not entered an valid string in cell ' +
+                            excel_cell + '. Valid string for row 4 is "include" or leave blank')
+        # columns that are not in the SQL table were checked with the column names
+        sql_column = sql_columns.get(column_names[i])
+        if script_type != 'delete' and sql_column is not None:
+            if not sql_column.is_identity:
                 # if script type is insert, and column cannot be null then automatically select
-                if column_is_nullable[i] == 'NO' and worksheet.loc['info'][1] not in ('select', 'update'):
-                    if worksheet.loc['include'][i] != 'include':
+                if not sql_column.is_nullable and script_type not in ('select', 'update'):
+                    if include_row[i] != 'include':
                         valid_template = False
-                        gui.createPopUpBox(
-                            'You have entered an invalid string in cell ' + getExcelCellToInsertInto(i, INCLUDE_ROW_INDEX) + '. This column must be included')
+                        report.addError(INCLUDE_REQUIRED_ERROR, title, excel_cell, 'You have entered an invalid string in cell ' +
+                                        excel_cell + '. This column must be included')
             else:  # column is identity column so cannot be updated or inserted into.
                 # insert/update on identity column is NOT allowed
-                if worksheet.loc['info'][1] != 'select':
-                    if worksheet.loc['include'][i] == 'include':
+                if script_type != 'select':
+                    if include_row[i] == 'include':
                         valid_template = False
-                        gui.createPopUpBox(
-                            'You have entered an invalid string in cell ' + getExcelCellToInsertInto(i, INCLUDE_ROW_INDEX) + '. This column cannot be included')
+                        report.addError(INCLUDE_FORBIDDEN_ERROR, title, excel_cell, 'You have entered an invalid string in cell ' +
+                                        excel_cell + '. This column cannot be included')
 
-    for i in range(len(worksheet.loc['where'])):
-        if worksheet.loc['where'][i] != None and worksheet.loc['where'][i] != 'where':
+    for i in range(len(where_row)):
+        if where_row[i] != None and where_row[i] != 'where':
             valid_template = False
-            gui.createPopUpBox(
-                'You have not entered an valid string in a cell in cell ' + getExcelCellToInsertInto(i, WHERE_ROW_INDEX) + '. Valid string for row 5 is "where" or leave blank')
+            excel_cell = getExcelCellToInsertInto(i, WHERE_ROW_INDEX)
+            report.addError(WHERE_ROW_ERROR, title, excel_cell, 'You have not entered an valid string in a cell in cell ' +
+                            excel_cell + '. Valid string for row 5 is "where" or leave blank')
 
-    return validateData(worksheet) and valid_template
+    return validateData(worksheet, report, title) and valid_template
 
 
-def validateWorksheetGeneric(worksheet):
+def validateWorksheetGeneric(worksheet, report, title):
     '''Validates the data in the passed in worksheet based on a generic SQL table.
+    Errors are added to the validation report.
 
-    :param1 worksheet: pandas.core.frame.DataFrame
+    :param1 worksheet: excel_reader.Worksheet
+    :param2 report: validation_report.ValidationReport
+    :param3 title: str
 
     :return: bool
     '''
 
     valid_template = True
+    header_rows = worksheet.header_rows
 
-    if pd.isnull(worksheet.loc['info'][0]):
+    if pd.isnull(header_rows.loc['info'][0]):
         valid_template = False
-        gui.createPopUpBox(
-            'You have not specified a SQL table name in cell "A1"')
-    if worksheet.loc['info'][1] not in TYPE_OF_SCRIPTS_AVAILABLE:
+        report.addError(TABLE_NAME_ERROR, title, 'A1',
+                        'You have not specified a SQL table name in cell "A1"')
+    if header_rows.loc['info'][1] not in TYPE_OF_SCRIPTS_AVAILABLE:
         valid_template = False
-        gui.createPopUpBox(
-            'You have not specified a valid script type in cell "B1"')
+        report.addError(SCRIPT_TYPE_ERROR, title, 'B1',
+                        'You have not specified a valid script type in cell "B1"')
 
-    for i in range(len(worksheet.loc['names'])):
-        if pd.isnull(worksheet.loc['names'][i]) and (worksheet.loc['include'][i] == 'include' or worksheet.loc['where'][i] == 'where'):
+    for i in range(len(header_rows.loc['names'])):
+        if pd.isnull(header_rows.loc['names'][i]) and (header_rows.loc['include'][i] == 'include' or header_rows.loc['where'][i] == 'where'):
             valid_template = False
-            gui.createPopUpBox(
-                'You have not entered a column name where one is required in cell ' + getExcelCellToInsertInto(i, COLUMN_NAMES_ROW_INDEX))
+            excel_cell = getExcelCellToInsertInto(i, COLUMN_NAMES_ROW_INDEX)
+            report.addError(COLUMN_NAME_ERROR, title, excel_cell,
+                            'You have not entered a column name where one is required in cell ' + excel_cell)
 
-    for i in range(len(worksheet.loc['types'])):
-        type = re.sub("[\(\[].*?[\)\]]", "",
-                      str(worksheet.loc['types'][i]))
-        if type not in SQL_STRING_TYPE and type not in SQL_NUMERIC_TYPE and type not in SQL_DATETIME_TYPE and type not in SQL_OTHER_TYPE:
-            if (worksheet.loc['include'][i] == 'include' or worksheet.loc['where'][i] == 'where'):
+    for i in range(len(header_rows.loc['types'])):
+        if not getSqlType(header_rows.loc['types'][i]).supported:
+            if (header_rows.loc['include'][i] == 'include' or header_rows.loc['where'][i] == 'where'):
                 valid_template = False
-                gui.createPopUpBox(
-                    'You have not entered a supported SQL type where one is required in cell ' + getExcelCellToInsertInto(i, COLUMN_DATA_TYPE_ROW_INDEX))
+                excel_cell = getExcelCellToInsertInto(
+                    i, COLUMN_DATA_TYPE_ROW_INDEX)
+                report.addError(DATA_TYPE_ERROR, title, excel_cell,
+                                'You have not entered a supported SQL type where one is required in cell ' + excel_cell)
 
-    for i in range(len(worksheet.loc['include'])):
-        if not (pd.isnull(worksheet.loc['include'][i])) and worksheet.loc['include'][i] != 'include':
+    for i in range(len(header_rows.loc['include'])):
+        if not (pd.isnull(header_rows.loc['include'][i])) and header_rows.loc['include'][i] != 'include':
             valid_template = False
-            gui.createPopUpBox(
-                'You have not entered an valid string in cell ' + getExcelCellToInsertInto(i, INCLUDE_ROW_INDEX) + '. Valid string for row 4 is "include" or leave blank')
+            excel_cell = getExcelCellToInsertInto(i, INCLUDE_ROW_INDEX)
+            report.addError(INCLUDE_ROW_ERROR, title, excel_cell, 'You have not entered an valid string in cell ' +
+                            excel_cell + '. Valid string for row 4 is "include" or leave blank')
 
-    for i in range(len(worksheet.loc['where'])):
-        if not (pd.isnull(worksheet.loc['where'][i])) and worksheet.loc['where'][i] != 'where':
+    for i in range(len(header_rows.loc['where'])):
+        if not (pd.isnull(header_rows.loc['where'][i])) and header_rows.loc['where'][i] != 'where':
             valid_template = False
-            gui.createPopUpBox(
-                'You have not entered an valid string in a cell in cell ' + getExcelCellToInsertInto(i, WHERE_ROW_INDEX) + '. Valid string for row 5 is "where" or leave blank')
+            excel_cell = getExcelCellToInsertInto(i, WHERE_ROW_INDEX)
+            report.addError(WHERE_ROW_ERROR, title, excel_cell, 'You have not entered an valid string in a cell in cell ' +
+                            excel_cell + '. Valid string for row 5 is "where" or leave blank')
 
-    return validateData(worksheet) and valid_template
+    return validateData(worksheet, report, title) and valid_template
 
 
-def validWorksheet(worksheet, validate_with_sql, title, skip_popup, write_script_for):
+def validWorksheet(worksheet, validate_with_sql, title, skip_popup, write_script_for, report):
     '''Calls the correct function to validate the passed worksheet based on
-    whether a user wants to connect to SQL or not.
+    whether a user wants to connect to SQL or not. Errors are added to the
+    validation report.
 
-    :param1 worksheet: pandas.core.frame.DataFrame
+    :param1 worksheet: excel_reader.Worksheet
     :param2 validate_with_sql: str
     :param3 title: str
+    :param4 skip_popup: int
+    :param5 write_script_for: str
+    :param6 report: validation_report.ValidationReport
 
     :return: bool
     '''
 
+    write_script_for, skip_popup = askToValidateWorksheet(
+        title, skip_popup, write_script_for)
+    valid_template = True
+    if write_script_for == "Yes":  # if the user says to write scripts for this sheet
+        valid_template = validateWorksheet(
+            worksheet, validate_with_sql, title, report)
+    else:
+        valid_template = False
+
+    return valid_template, skip_popup, write_script_for
+
+
+def askToValidateWorksheet(title, skip_popup, write_script_for):
+    '''Asks the user whether to validate/create scripts for the worksheet,
+    unless they have chosen to do the same for all spreadsheets.
+
+    :param1 title: str
+    :param2 skip_popup: int
+    :param3 write_script_for: str
+
+    :return: str, int
+    '''
+
+    # imported here so the command line mode never imports tkinter
+    import global_gui as gui
+
     description = "Would you like to validate/create scripts for " + \
         title + " worksheet?"
     yes = "Yes"
@@ -195,28 +272,93 @@ def validWorksheet(worksheet, validate_with_sql, title, skip_popup, write_script
     if not skip_popup:
         write_script_for, skip_popup = gui.createTwoChoiceBox(
             description, yes, no, additional_box=(True, 'Do this for all spreadsheets.'))
-    print(write_script_for, skip_popup)
+    if write_script_for != yes and not skip_popup:
+        gui.createPopUpBox(
+            'Validation failed. Scripts will not be written for ' + title)
+
+    return write_script_for, skip_popup
+
+
+def chooseWorksheets(titles):
+    '''Asks the user which of the worksheets to validate/create scripts for
+    before any of them are processed. Returns the chosen worksheets in order and
+    whether the user chose to do the same for all spreadsheets.
+
+    :param1 titles: List[str]
+
+    :return: List[str], int
+    '''
+
+    worksheets = []
+    skip_popup = 0
+    write_script_for = "Yes"
+
+    for title in titles:
+        write_script_for, skip_popup = askToValidateWorksheet(
+            title, skip_popup, write_script_for)
+        if write_script_for == "Yes":
+            worksheets.append(title)
+
+    return worksheets, skip_popup
+
+
+def validateWorksheet(worksheet, validate_with_sql, title, report, sql_connection=None, schema_catalog=None):
+    '''Calls the correct function to validate the passed worksheet based on
+    whether it is validated against a SQL table ('SQL') or generically
+    ('Generic'). Errors are added to the validation report.
+
+    :param1 worksheet: excel_reader.Worksheet
+    :param2 validate_with_sql: str
+    :param3 title: str
+    :param4 report: validation_report.ValidationReport
+    :param5 sql_connection: tuple
+    :param6 schema_catalog: schema_catalog.SchemaCatalog
+
+    :return: bool
+    '''
+
     valid_template = True
     if validate_with_sql == 'Generic':
-        if write_script_for == yes:  # if the user says to write scripts for this sheet
-            valid_template = validateWorksheetGeneric(
-                worksheet) and valid_template
-        else:
-            valid_template = False
-            if not skip_popup:
-                gui.createPopUpBox(
-                    'Validation failed. Scripts will not be written for ' + title)
-
+        valid_template = validateWorksheetGeneric(worksheet, report, title)
     elif validate_with_sql == 'SQL':
-        if write_script_for == yes:  # if the user says to write scripts for this sheet
-            valid_template = validateWorksheetSQL(worksheet) and valid_template
-        else:
-            valid_template = False
-            if not skip_popup:
-                gui.createPopUpBox(
-                    'Validation failed. Scripts will not be written for ' + title)
+        valid_template = validateWorksheetSQL(
+            worksheet, report, title, sql_connection, schema_catalog)
 
-    return valid_template, skip_popup, write_script_for
+    return valid_template
+
+
+def validateWorkbookFile(filename, validate_worksheet, report, chunk_size=READ_CHUNK_ROWS, sheet_names=None):
+    '''Streams each worksheet of an Excel workbook file chunk_size rows at a
+    time and validates it. The first chunk of each worksheet (header rows and
+    data) is checked with the passed in validate_worksheet(worksheet, title)
+    function, later chunks only have their data validated. Errors are added to
+    the validation report. If sheet_names is passed only those worksheets are
+    validated.
+
+    :param1 filename: str
+    :param2 validate_worksheet: function
+    :param3 report: validation_report.ValidationReport
+    :param4 chunk_size: int
+    :param5 sheet_names: List[str]
+
+    :return: bool, bool
+    '''
+
+    any_valid_sheets = False  # False if all spreadsheets fail validation
+    all_valid_sheets = True  # True if all spreadsheets pass validation
+
+    for title, chunks in excel_reader.iterateWorkbook(filename, chunk_size, sheet_names):
+        valid_worksheet = True
+        for row_offset, chunk in chunks:
+            if row_offset == 0:  # first chunk. validate header rows and data
+                valid_worksheet = validate_worksheet(chunk, title)
+            else:
+                valid_worksheet = validateData(
+                    chunk, report, title, row_offset) and valid_worksheet
+        all_valid_sheets = valid_worksheet and all_valid_sheets
+        any_valid_sheets = valid_worksheet or any_valid_sheets
+
+    return any_valid_sheets, all_valid_sheets
 
 
 def getSQLTableInfo(sql_table_name, cursor):
@@ -248,12 +390,77 @@ def getSQLTableInfo(sql_table_name, cursor):
     return sql_column_names, sql_column_types, column_is_nullable, column_is_identity
 
 
+def loadSchemaCatalog(sql_server_name, sql_database_name, table_names, refresh_schema=False, offline=False):
+    '''Loads the design of the tables into the pooled schema catalog of a
+    database from the schema cache file, querying SQL Server with a single
+    query for the tables that are not cached or have changed. Tables already
+    in the catalog are not loaded again. If refresh_schema is True every table
+    is queried again. If offline is True, or SQL Server cannot be connected
+    to, only the cached tables are loaded.
+
+    :param1 sql_server_name: str
+    :param2 sql_database_name: str
+    :param3 table_names: List[str]
+    :param4 refresh_schema: bool
+    :param5 offline: bool
+
+    :return: schema_catalog.SchemaCatalog
+    '''
+
+    def getCursor():  # only connects if a table has to be queried
+        try:
+            return sql_connection_pool.getConnection(sql_server_name, sql_database_name).cursor()
+        except pyodbc.Error as e:
+            print('Could not connect to ' + sql_database_name + ' on ' + sql_server_name +
+                  '. Using the cached design of its tables. ' + repr(e), file=sys.stderr)
+            return None
+
+    return SchemaCache().load(sql_connection_pool.getSchemaCatalog(sql_server_name, sql_database_name),
+                              None if offline else getCursor, sql_server_name, sql_database_name, table_names, refresh_schema)
+
+
+def prefetchSchemaCatalog(table_names):
+    '''Loads the design of the tables into the schema catalog of the database
+    chosen by the user, so worksheets validated with SQL do not query them
+    one at a time.
+
+    :param1 table_names: List[str]
+
+    :return: schema_catalog.SchemaCatalog
+    '''
+
+    tables, cursor, sql_database_name = connectToSQLServer()
+
+    return loadSchemaCatalog(SQL_SERVER_NAME, sql_database_name, table_names)
+
+
 def connectToSQLServer():
     '''Connects to an instance of a SQL Server and allows the user to choose a
-    database to work with on that instance.
+    database to work with on that instance. The user is only asked the first
+    time, later calls reuse the chosen database and its pooled connection.
 
-    :return: List[str], pyodbc.cursor
+    :return: List[str], pyodbc.cursor, str
+    '''
+
+    if sql_connection_pool.sql_database_name is None:
+        sql_connection_pool.sql_database_name = chooseSQLDatabase()
+    sql_database_name = sql_connection_pool.sql_database_name
+
+    tables, cursor = connectToSQLDatabase(SQL_SERVER_NAME, sql_database_name)
+
+    return tables, cursor, sql_database_name
+
+
+def chooseSQLDatabase():
+    '''Lists the databases on the instance of SQL Server and allows the user
+    to choose one to work with.
+
+    :return: str
     '''
+
+    # imported here so the command line mode never imports tkinter
+    import global_gui as gui
+
     '''
     computer_name = str(subprocess.run(["hostname.exe"], text=True, stdout=subprocess.PIPE, input="").stdout).upper().split()[0]
     all_servers = subprocess.run(["sqlcmd", "-L"], text=True, stdout=subprocess.PIPE, input="").stdout.split()[1:]
@@ -281,23 +488,7 @@ def connectToSQLServer():
     label = 'SQL Server name: '
     sql_server_name = gui.createDropDownBox(description, label, local_servers)
     '''
-    # opens connection to specified SQL server and master DB to get list of all dbs on server
-    dbs = pyodbc.connect('Driver={SQL Server};'
-                         'Server=' + 'CHA1WS003746\\MSSQLSERVER2016' + ';'
-                         'Database=' + 'master' + ';'
-                         'Trusted_Connection=yes;')
-
-    dbs_cursor = dbs.cursor()
-
-    # executes SQL script on database connection to get list of all dbs on server
-    dbs_cursor.execute(
-        "SELECT name, database_id, create_date FROM sys.databases;")
-
-    databases = []
-
-    # populate databases with each database selected from the query
-    for db in dbs_cursor:
-        databases.append(db[0])
+    databases = sql_connection_pool.getDatabases(SQL_SERVER_NAME)
 
     description = "Please enter the name of the database where the table you'd like to work with is located:"
     label = 'SQL database name: '
@@ -305,25 +496,149 @@ def connectToSQLServer():
     sql_database_name = gui.createDropDownBox(
         description, label, databases)
 
-    # opens connection to specified SQL server and database
-    conn = pyodbc.connect('Driver={SQL Server};'
-                          'Server=' + 'CHA1WS003746\\MSSQLSERVER2016' + ';'
-                          'Database=' + sql_database_name + ';'
-                          'Trusted_Connection=yes;')
+    return sql_database_name
 
-    cursor = conn.cursor()
 
-    # executes SQL script on database connection to get all tables in the database
-    cursor.execute("SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE = 'BASE TABLE' AND TABLE_CATALOG='" +
-                   sql_database_name + "' ORDER BY TABLE_NAME;")
+def connectToSQLDatabase(sql_server_name, sql_database_name):
+    '''Gets the list of tables in a database on an instance of a SQL Server and
+    a new cursor on the pooled connection to it. The connection is only opened
+    and the tables are only listed the first time.
 
-    tables = []
+    :param1 sql_server_name: str
+    :param2 sql_database_name: str
 
-    # populate tables with each table in the database
-    for table in cursor:
-        tables.append(table[0])
+    :return: List[str], pyodbc.cursor
+    '''
 
-    return tables, cursor, sql_database_name
+    tables = sql_connection_pool.getTables(sql_server_name, sql_database_name)
+    cursor = sql_connection_pool.getConnection(
+        sql_server_name, sql_database_name).cursor()
+
+    return tables, cursor
+
+
+class SQLConnectionPool:
+    '''Open connections to SQL Server databases, one per server and database,
+    reused by every worksheet and mode of the program until close() is called.
+    The databases of each server and the tables of each database are only
+    listed once, and the design of tables is kept in a schema catalog per
+    database.
+    '''
+
+    def __init__(self):
+        '''Creates an empty pool.
+        '''
+
+        self.connections = {}
+        self.databases = {}
+        self.tables = {}
+        self.schema_catalogs = {}
+        self.sql_database_name = None  # database chosen by the user
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def getConnection(self, sql_server_name, sql_database_name):
+        '''Gets the connection to a database, opening it the first time it is
+        used or if it has been closed.
+
+        :param1 sql_server_name: str
+        :param2 sql_database_name: str
+
+        :return: pyodbc.Connection
+        '''
+
+        key = (sql_server_name, sql_database_name)
+        connection = self.connections.get(key)
+        if connection is None or getattr(connection, 'closed', False):
+            connection = pyodbc.connect('Driver={SQL Server};'
+                                        'Server=' + sql_server_name + ';'
+                                        'Database=' + sql_database_name + ';'
+                                        'Trusted_Connection=yes;')
+            self.connections[key] = connection
+
+        return connection
+
+    def getDatabases(self, sql_server_name):
+        '''Gets the names of the databases on an instance of SQL Server.
+
+        :param1 sql_server_name: str
+
+        :return: List[str]
+        '''
+
+        if sql_server_name not in self.databases:
+            cursor = self.getConnection(sql_server_name, 'master').cursor()
+            # executes SQL script on database connection to get list of all dbs on server
+            cursor.execute(
+                "SELECT name, database_id, create_date FROM sys.databases;")
+            self.databases[sql_server_name] = [db[0] for db in cursor]
+
+        return self.databases[sql_server_name]
+
+    def getTables(self, sql_server_name, sql_database_name):
+        '''Gets the names of the tables in a database.
+
+        :param1 sql_server_name: str
+        :param2 sql_database_name: str
+
+        :return: List[str]
+        '''
+
+        key = (sql_server_name, sql_database_name)
+        if key not in self.tables:
+            cursor = self.getConnection(
+                sql_server_name, sql_database_name).cursor()
+            # executes SQL script on database connection to get all tables in the database
+            cursor.execute("SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE = 'BASE TABLE' AND TABLE_CATALOG='" +
+                           sql_database_name + "' ORDER BY TABLE_NAME;")
+            self.tables[key] = [table[0] for table in cursor]
+
+        return self.tables[key]
+
+    def getSchemaCatalog(self, sql_server_name, sql_database_name):
+        '''Gets the schema catalog of a database, which is empty until tables
+        are loaded into it.
+
+        :param1 sql_server_name: str
+        :param2 sql_database_name: str
+
+        :return: schema_catalog.SchemaCatalog
+        '''
+
+        return self.schema_catalogs.setdefault((sql_server_name, sql_database_name), SchemaCatalog())
+
+    def close(self):
+        '''Closes every connection in the pool and forgets what was listed
+        through them.
+        '''
+
+        for connection in self.connections.values():
+            if not getattr(connection, 'closed', False):
+                connection.close()
+        self.__init__()
+
+
+'''
+Connections shared by the whole program. Worker processes each have their own
+'''
+sql_connection_pool = SQLConnectionPool()
+
+
+def closeSQLConnections():
+    '''Closes every open connection to SQL Server. Called when a mode of the
+    program finishes and when the program exits.
+
+    :return: NONE
+    '''
+
+    sql_connection_pool.close()
+
+
+atexit.register(closeSQLConnections)
 
 
 def getExcelCellToInsertInto(column, row):
@@ -335,11 +650,50 @@ def getExcelCellToInsertInto(column, row):
     :return: str
     '''
 
-    # column is retrieved by finding the key of the LETTER_INDEX_DICT that the value(index) belongs to.
-    excel_column = list(LETTER_INDEX_DICT.keys())[list(
-        LETTER_INDEX_DICT.values()).index(column)]
-    excel_row = str(row + 1)
     # excel coordinate cell that script should be inserted into
-    excel_cell = excel_column + excel_row
+    return excel_address.getCellAddress(column, row)
+
+
+def createTemplateWorksheet(sql_table_name, script_type, sql_column_names, sql_column_types, sql_include_row, sql_where_row):
+    '''Creates a template worksheet for a SQL table. The include and where rows
+    are lists with a 1 for each column that is included/in the where clause, or
+    empty if the script type has no include/where row.
+
+    :param1 sql_table_name: str
+    :param2 script_type: str
+    :param3 sql_column_names: List[str]
+    :param4 sql_column_types: List[str]
+    :param5 sql_include_row: List[int]
+    :param6 sql_where_row: List[int]
+
+    :return: excel_reader.Worksheet
+    '''
+
+    # table name and script type are in the first two cells so there must be at least 2 columns
+    number_of_columns = max(len(sql_column_names), 2)
+    worksheet = pd.DataFrame(np.nan, index=HEADER_ROW_LABELS, columns=range(
+        number_of_columns), dtype=object)
+
+    # populates top info row
+    worksheet.iloc[INFO_ROW, TABLE_NAME] = sql_table_name
+    worksheet.iloc[INFO_ROW, SCRIPT_TYPE] = script_type
+
+    # populates next 4 rows in the Excel template with data from column lists
+    for i in range(len(sql_column_names)):
+        worksheet.iloc[COLUMN_NAMES_ROW_INDEX, i] = sql_column_names[i]
+        worksheet.iloc[COLUMN_DATA_TYPE_ROW_INDEX, i] = sql_column_types[i]
+        if len(sql_include_row) > 0 and sql_include_row[i] == 1:
+            worksheet.iloc[INCLUDE_ROW_INDEX, i] = 'include'
+        if len(sql_where_row) > 0 and sql_where_row[i] == 1:
+            worksheet.iloc[WHERE_ROW_INDEX, i] = 'where'
+
+    return excel_reader.splitWorksheet(worksheet)
+
+
+def createGenericTemplate():
+    '''Creates a template workbook filled with generic table data.
+
+    :return: dict
+    '''
 
-    return excel_cell
+    return {'IOChannels': excel_reader.splitWorksheet(pd.DataFrame(data=GENERIC_TEMPLATE))}
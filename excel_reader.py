@@ -0,0 +1,358 @@
+'''
+Module of 'excel.py' that handles reading and writing Excel workbook files.
+Workbooks can also be read a fixed number of rows at a time so that very
+large workbooks can be processed in bounded memory.
+Matt Saffert
+1-9-2020
+'''
+
+import collections
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from excel_constants import *
+
+
+'''
+A worksheet split into its header rows, labeled by HEADER_ROW_LABELS, and its
+data rows, numbered from 0 with each column cast to the dtype of its SQL type
+(see coerceDataTypes()). Both frames have the same columns.
+ex. (header_rows: 5 rows x 3 columns, data: 20000 rows x 3 columns)
+'''
+Worksheet = collections.namedtuple('Worksheet', ['header_rows', 'data'])
+
+
+def readWorkbook(filename):
+    '''Reads every worksheet of an Excel workbook using pandas, with each
+    worksheet split into its header rows and typed data rows.
+
+    :param1 filename: str
+
+    :return: dict
+    '''
+
+    workbook = pd.read_excel(filename, header=None, sheet_name=None)
+
+    return reformatExcelInput(workbook)
+
+
+def reformatExcelInput(workbook):
+    '''Reformats the inputed Excel data to work with program.
+
+    :param1 workbook: dict
+
+    :return: dict
+    '''
+
+    for worksheet in workbook:
+        workbook[worksheet] = splitWorksheet(workbook[worksheet])
+
+    return workbook
+
+
+def splitWorksheet(worksheet):
+    '''Splits a worksheet read as one DataFrame (header rows followed by data
+    rows) into a Worksheet. Header rows are labeled by name and padded with
+    blank rows to all five header rows the same way as createHeaderRows(),
+    blank rows at the end of the data rows are dropped and the data rows are
+    numbered from 0 and cast to the dtypes of their SQL types.
+
+    :param1 worksheet: pandas.core.frame.DataFrame
+
+    :return: Worksheet
+    '''
+
+    header_rows = worksheet.iloc[:START_OF_DATA_ROWS_INDEX].astype(object)
+    header_rows.index = HEADER_ROW_LABELS[:len(header_rows)]
+    header_rows = header_rows.reindex(HEADER_ROW_LABELS)
+    data = dropBlankLastRows(worksheet.iloc[START_OF_DATA_ROWS_INDEX:])
+    data.index = pd.RangeIndex(len(data))
+
+    return createWorksheet(header_rows, data)
+
+
+def dropBlankLastRows(data):
+    '''Drops the blank rows at the end of a worksheet's data rows, the same way
+    iterateWorksheetChunks() does. Blank rows between rows of data are kept.
+
+    :param1 data: pandas.core.frame.DataFrame
+
+    :return: pandas.core.frame.DataFrame
+    '''
+
+    filled_rows = np.flatnonzero(data.notna().any(axis=1).to_numpy())
+    last_row = 0 if len(filled_rows) == 0 else filled_rows[-1] + 1
+
+    return data.iloc[:last_row]
+
+
+def createWorksheet(header_rows, data):
+    '''Creates a Worksheet from its header rows and its data rows, with each
+    data column cast to the native dtype of its SQL type in the types row.
+    This is the only place data rows are cast, so every worksheet that is
+    read holds its data natively from then on.
+
+    :param1 header_rows: pandas.core.frame.DataFrame
+    :param2 data: pandas.core.frame.DataFrame
+
+    :return: Worksheet
+    '''
+
+    if len(header_rows) > COLUMN_DATA_TYPE_ROW_INDEX:
+        data = coerceDataTypes(
+            data, header_rows.iloc[COLUMN_DATA_TYPE_ROW_INDEX])
+
+    return Worksheet(header_rows, data)
+
+
+def writeWorkbook(workbook, filename):
+    '''Writes each worksheet of the workbook to a sheet of an Excel file, its
+    header rows followed by its data rows.
+
+    :param1 workbook: dict
+    :param2 filename: str
+
+    :return: NONE
+    '''
+
+    with pd.ExcelWriter(filename) as writer:
+        for worksheet in workbook:
+            pd.concat([workbook[worksheet].header_rows, workbook[worksheet].data]).to_excel(
+                writer, sheet_name=worksheet, header=False, index=False)
+
+
+def getSheetNames(filename):
+    '''Gets the titles of the worksheets of an Excel workbook, in order,
+    without reading their rows.
+
+    :param1 filename: str
+
+    :return: List[str]
+    '''
+
+    workbook = load_workbook(
+        filename, read_only=True, data_only=True, keep_links=False)
+
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+def getTableNames(filename):
+    '''Gets the table name in cell A1 of each worksheet of an Excel workbook, in
+    order, without duplicates and without reading the other rows.
+
+    :param1 filename: str
+
+    :return: List[str]
+    '''
+
+    workbook = load_workbook(
+        filename, read_only=True, data_only=True, keep_links=False)
+
+    try:
+        table_names = [next(sheet.iter_rows(min_row=1, max_row=1, max_col=1, values_only=True), (None,))[0]
+                       for sheet in workbook.worksheets]
+    finally:
+        workbook.close()
+
+    return [name for name in dict.fromkeys(table_names) if isinstance(name, str)]
+
+
+def iterateWorkbook(filename, chunk_size=READ_CHUNK_ROWS, sheet_names=None):
+    '''Opens an Excel workbook in read-only mode and yields the title of each
+    worksheet with an iterator over its chunks of rows. Each worksheet must be
+    fully consumed (or skipped) before moving on to the next one. If
+    sheet_names is passed only those worksheets are read.
+
+    :param1 filename: str
+    :param2 chunk_size: int
+    :param3 sheet_names: List[str]
+
+    :return: Iterator[Tuple[str, Iterator[Tuple[int, Worksheet]]]]
+    '''
+
+    workbook = load_workbook(
+        filename, read_only=True, data_only=True, keep_links=False)
+
+    try:
+        for sheet in workbook.worksheets:
+            if sheet_names is not None and sheet.title not in sheet_names:
+                continue
+            yield sheet.title, iterateWorksheetChunks(sheet, chunk_size)
+    finally:
+        workbook.close()
+
+
+def iterateWorksheetChunks(sheet, chunk_size=READ_CHUNK_ROWS):
+    '''Reads the five header rows of a worksheet and then yields its data rows
+    chunk_size rows at a time. Each chunk is a Worksheet like the worksheets
+    returned by readWorkbook(), with the same header rows frame shared by every
+    chunk and typed data rows numbered from the number of data rows that came
+    before it in the worksheet. Each chunk is yielded with that number. At
+    least one chunk is always yielded so that the header rows can be
+    validated even when the worksheet has no data.
+
+    Trailing blank rows are dropped and cells to the right of the header rows
+    are ignored.
+
+    :param1 sheet: openpyxl.worksheet._read_only.ReadOnlyWorksheet
+    :param2 chunk_size: int
+
+    :return: Iterator[Tuple[int, Worksheet]]
+    '''
+
+    rows = sheet.iter_rows()
+
+    header_rows = []
+    for row in rows:
+        header_rows.append(convertRow(row))
+        if len(header_rows) == START_OF_DATA_ROWS_INDEX:
+            break
+    width = max([len(row) for row in header_rows] + [0])
+    header_rows = createHeaderRows(header_rows, width)
+
+    row_offset = 0
+    data_rows = []
+    blank_rows = []  # blank rows are only kept if a row with data comes after them
+    for row in rows:
+        data_row = convertRow(row)[:width]
+        if len(data_row) == 0:
+            blank_rows.append(data_row)
+            continue
+        data_rows.extend(blank_rows)
+        blank_rows = []
+        data_rows.append(data_row)
+        if len(data_rows) >= chunk_size:
+            yield row_offset, createWorksheet(header_rows, createDataFrame(data_rows[:chunk_size], width, row_offset))
+            row_offset += chunk_size
+            data_rows = data_rows[chunk_size:]
+
+    if len(data_rows) > 0 or row_offset == 0:
+        yield row_offset, createWorksheet(header_rows, createDataFrame(data_rows, width, row_offset))
+
+
+def convertRow(row):
+    '''Converts a row of openpyxl cells to a list of values the same way pandas
+    does when it reads an Excel workbook, with trailing blank cells trimmed.
+
+    :param1 row: Tuple[openpyxl.cell.read_only.ReadOnlyCell]
+
+    :return: List[?]
+    '''
+
+    values = [convertCellValue(cell) for cell in row]
+    while len(values) > 0 and values[-1] is np.nan:
+        values.pop()
+
+    return values
+
+
+def convertCellValue(cell):
+    '''Converts the value of an openpyxl cell. Blank cells, error cells and
+    strings pandas treats as missing become NaN and whole numbers become int.
+
+    :param1 cell: openpyxl.cell.read_only.ReadOnlyCell
+
+    :return: ?
+    '''
+
+    value = cell.value
+    if value is None or cell.data_type == TYPE_ERROR:
+        return np.nan
+    elif cell.data_type == TYPE_NUMERIC:
+        if int(value) == value:
+            return int(value)
+    elif isinstance(value, str) and value in EXCEL_NA_VALUES:
+        return np.nan
+
+    return value
+
+
+def createHeaderRows(header_rows, width):
+    '''Creates the DataFrame of the five header rows of a worksheet. Rows are
+    padded to the width of the worksheet and labeled the same way as
+    splitWorksheet().
+
+    :param1 header_rows: List[List[?]]
+    :param2 width: int
+
+    :return: pandas.core.frame.DataFrame
+    '''
+
+    header_rows = header_rows + [[]] * \
+        (START_OF_DATA_ROWS_INDEX - len(header_rows))
+    rows = [row + [np.nan] * (width - len(row)) for row in header_rows]
+
+    return pd.DataFrame(rows, index=HEADER_ROW_LABELS, columns=range(width), dtype=object)
+
+
+def createDataFrame(data_rows, width, row_offset=0):
+    '''Creates the DataFrame of a chunk of data rows, padded to the width of
+    the worksheet and numbered from row_offset. The columns are cast to their
+    dtypes by createWorksheet().
+
+    :param1 data_rows: List[List[?]]
+    :param2 width: int
+    :param3 row_offset: int
+
+    :return: pandas.core.frame.DataFrame
+    '''
+
+    rows = [row + [np.nan] * (width - len(row)) for row in data_rows]
+
+    return pd.DataFrame(rows, index=pd.RangeIndex(row_offset, row_offset + len(data_rows)),
+                        columns=range(width), dtype=object)
+
+
+def coerceDataTypes(data, types):
+    '''Casts each column of data rows from object to the dtype of its SQL type
+    in DATA_COLUMN_DTYPES, so values are stored natively instead of as boxed
+    Python objects. ex. int -> Int64, varchar(50) -> string. A column is only
+    cast if every value in it is of the kind its dtype holds and converts
+    exactly. Other columns (ex. a cell of text in an int column) are left as
+    they are to be reported by validation and written as they were read.
+
+    :param1 data: pandas.core.frame.DataFrame
+    :param2 types: pandas.core.series.Series
+
+    :return: pandas.core.frame.DataFrame
+    '''
+
+    columns = {}
+    for i in range(min(len(types), len(data.columns))):
+        values = data.iloc[:, i]
+        dtype = getDataType(types.iloc[i], values)
+        if dtype is not None:
+            try:
+                columns[data.columns[i]] = values.astype(dtype)
+            except (TypeError, ValueError, OverflowError):
+                pass
+
+    if len(columns) == 0:
+        return data
+
+    return pd.DataFrame({column: columns.get(column, data[column]) for column in data.columns}, index=data.index)
+
+
+def getDataType(type, values):
+    '''Gets the dtype a data column of the SQL type is cast to, or None if the
+    column is left as objects because of its type or the values in it.
+
+    :param1 type: str
+    :param2 values: pandas.core.series.Series
+
+    :return: str
+    '''
+
+    sql_type = getSqlType(type)
+    if not sql_type.supported or sql_type.base not in DATA_COLUMN_DTYPES:
+        return None
+
+    dtype, kinds = DATA_COLUMN_DTYPES[sql_type.base]
+    if pd.api.types.infer_dtype(values, skipna=True) not in kinds:
+        return None
+
+    return dtype
@@ -7,7 +7,7 @@ Matt Saffert
 import tkinter
 from excel_constants import *
 from tkinter import filedialog as tkFileDialog
-import pandas as pd
+import excel_reader
 
 
 def saveToExcel(workbook):
@@ -27,10 +27,7 @@ def saveToExcel(workbook):
         initialdir="C:/", title="Select/create file to save/write to", defaultextension=".xlsx")
 
     # saves new workbook with generated scripts to a user selected file
-    with pd.ExcelWriter(file.filename) as writer:
-        for worksheet in workbook:
-            workbook[worksheet].to_excel(
-                writer, sheet_name=worksheet, header=False, index=False)
+    excel_reader.writeWorkbook(workbook, file.filename)
 
     file.destroy()
 
@@ -47,6 +44,21 @@ def openExcelFile(output_string):
     :return: dict
     '''
 
+    filename = getExcelFileName(output_string)
+
+    workbook = excel_reader.readWorkbook(filename)
+
+    return workbook
+
+
+def getExcelFileName(output_string):
+    '''Asks the user to choose an existing Excel workbook.
+
+    :param1 output_string: str
+
+    :return: str
+    '''
+
     createPopUpBox(output_string)  # tkinter dialog box
 
     file = tkinter.Tk()
@@ -56,11 +68,7 @@ def openExcelFile(output_string):
         initialdir="C:/", title="Select file to write scripts for")
     file.destroy()
 
-    workbook = pd.read_excel(file.filename, header=None, sheet_name=None)
-
-    workbook = reformatExcelInput(workbook)
-
-    return workbook
+    return file.filename
 
 
 def addQuitMenuButton(root):
@@ -153,6 +161,35 @@ def getProgramMode():
     return program_mode.get()
 
 
+def getWriteTarget():
+    '''Creates a tkinter dialog box that asks the user where they'd like the
+    scripts to go. (a ".sql" file, an Excel spreadsheet, bulk load files, or
+    run directly against a database)
+
+    :return: str
+    '''
+
+    description = "Where would you like the SQL scripts to go: "
+    root = generateWindow("500x500", description, relx=0.5, rely=0.1)
+
+    write_to = tkinter.StringVar()
+    write_to.set("SQL")
+
+    tkinter.Radiobutton(root, text='Write to a ".sql" file', variable=write_to,
+                        value='SQL').place(relx=0.5, rely=0.3, anchor='center')
+    tkinter.Radiobutton(root, text='Write to an Excel spreadsheet', variable=write_to,
+                        value='Excel').place(relx=0.5, rely=0.4, anchor='center')
+    tkinter.Radiobutton(root, text='Execute against a SQL database', variable=write_to,
+                        value='Execute').place(relx=0.5, rely=0.5, anchor='center')
+    tkinter.Radiobutton(root, text='Write bulk load files (insert worksheets)', variable=write_to,
+                        value='Bulk').place(relx=0.5, rely=0.6, anchor='center')
+    tkinter.Button(root, text='Next', width=25, command=root.destroy).place(
+        relx=0.5, rely=0.7, anchor='center')
+    tkinter.mainloop()
+
+    return write_to.get()
+
+
 def createPopUpBox(description, dimensions="450x150"):
     '''Creates a tkinter pop-up box that displays whatever text is input with an "Ok" button
     to acknowledge info/close window
@@ -168,24 +205,48 @@ def createPopUpBox(description, dimensions="450x150"):
     tkinter.mainloop()
 
 
-def createInvalidCellBox(description, dimensions="450x150"):
-    '''Creates a tkinter pop-up box that displays whatever text is input with an "Ok" button
-    to acknowledge info/close window
+def createReportBox(report, dimensions="700x500"):
+    '''Creates a tkinter pop-up box that displays every error in a validation
+    report in a scrollable text box, with buttons to save the report to a
+    CSV/JSON file or acknowledge info/close window
 
-    :param1 description: str
+    :param1 report: validation_report.ValidationReport
     :param2 dimensions: str
     '''
 
-    root = generateWindow(dimensions, description, relx=0.5, rely=0.2)
-
-    additional_box_val = tkinter.IntVar()
-    createCheckBox(root, 'Would you like to ignore remaining errors?', additional_box_val, 0.5, 0.6, select=False)
-
+    root = generateWindow(dimensions, 'Validation errors:', relx=0.5, rely=0.05)
+
+    frame = tkinter.Frame(root)
+    frame.place(relx=0.5, rely=0.45, relwidth=0.9,
+                relheight=0.7, anchor='center')
+    scrollbar = tkinter.Scrollbar(frame)
+    scrollbar.pack(side='right', fill='y')
+    text = tkinter.Text(frame, wrap='word', yscrollcommand=scrollbar.set)
+    text.insert('end', report.formatSummary())
+    text.config(state='disabled')
+    text.pack(side='left', fill='both', expand=True)
+    scrollbar.config(command=text.yview)
+
+    tkinter.Button(root, text='Save report', width=25, command=lambda: saveReport(report)).place(
+        relx=0.3, rely=0.9, anchor='center')
     tkinter.Button(root, text='Ok', width=25, command=root.destroy).place(
-        relx=0.5, rely=0.8, anchor='center')
+        relx=0.7, rely=0.9, anchor='center')
     tkinter.mainloop()
 
-    return additional_box_val.get()
+
+def saveReport(report):
+    '''Saves a validation report to a user selected CSV or JSON file.
+
+    :param1 report: validation_report.ValidationReport
+
+    :return: NONE
+    '''
+
+    filename = tkFileDialog.asksaveasfilename(
+        initialdir="C:/", title="Select/create file to save/write to", defaultextension=".csv",
+        filetypes=[('CSV', '*.csv'), ('JSON', '*.json')])
+    if filename:
+        report.saveReport(filename)
 
 
 def createTextEntryBox(description, label):
@@ -276,27 +337,6 @@ def addLabelToBox(root, description, relx=0.5, rely=0.2, anchor='center'):
     w.place(relx=relx, rely=rely, anchor=anchor)
 
 
-def reformatExcelInput(workbook):
-    '''Reformats the inputed Excel data to work with program.
-
-    :param1 workbook: dict
-
-    :return: dict
-    '''
-
-    for worksheet in workbook:
-        workbook[worksheet] = workbook[worksheet].rename(index={0: "info"})
-        workbook[worksheet] = workbook[worksheet].rename(index={1: "names"})
-        workbook[worksheet] = workbook[worksheet].rename(index={2: "types"})
-        workbook[worksheet] = workbook[worksheet].rename(index={3: "include"})
-        workbook[worksheet] = workbook[worksheet].rename(index={4: "where"})
-        for i in range(5, len(workbook[worksheet])):
-            workbook[worksheet] = workbook[worksheet].rename(index={
-                                                             i: (i - 5)})
-
-    return workbook
-
-
 def generateWindow(dimensions, description, relx=0.5, rely=0.2, anchor='center'):
     '''Inserts text into a tkinter dialog box.
 
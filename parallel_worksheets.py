@@ -0,0 +1,282 @@
+'''
+Module of 'excel.py' that validates and creates the scripts for the worksheets
+of a workbook in a pool of worker processes, one worksheet per task. Results
+are always returned in the order of the worksheets, whatever order the workers
+finish in, and record how long each worksheet took. Contains no GUI code.
+Matt Saffert
+1-27-2020
+'''
+
+from excel_constants import *
+import collections
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import excel_global
+import excel_reader
+import schema_catalog
+import script_generator
+from validation_report import ValidationReport
+
+
+'''
+The outcome of processing one worksheet. scripts is the list of scripts of the
+worksheet, or the file they were written to when the worksheet was streamed
+from a workbook file. seconds is how long the worksheet took to process.
+'''
+WorksheetResult = collections.namedtuple(
+    'WorksheetResult', ['title', 'valid', 'errors', 'scripts', 'scripts_written', 'seconds'])
+
+
+def runInWorkers(function, arguments, workers=WORKSHEET_WORKERS):
+    '''Calls the function once for each tuple of arguments across a pool of
+    worker processes and returns the results in the order of the arguments.
+    With 1 worker the calls are made one after another in this process.
+
+    :param1 function: function
+    :param2 arguments: List[tuple]
+    :param3 workers: int
+
+    :return: List[?]
+    '''
+
+    if workers <= 1 or len(arguments) <= 1:
+        return [function(*argument) for argument in arguments]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(arguments))) as executor:
+        futures = [executor.submit(function, *argument)
+                   for argument in arguments]
+
+        return [future.result() for future in futures]
+
+
+def createSQLConnection(validate_with_sql, sql_database):
+    '''Connects to the SQL database used to validate worksheets in a worker
+    process. Connections cannot be passed between processes so each worker
+    process opens its own, which is pooled and reused by every task it runs.
+
+    :param1 validate_with_sql: str
+    :param2 sql_database: Tuple[str, str]
+
+    :return: tuple
+    '''
+
+    if validate_with_sql == 'SQL' and sql_database is not None:
+        return excel_global.connectToSQLDatabase(*sql_database)
+
+    return None
+
+
+def loadSchemaCatalog(validate_with_sql, sql_database, table_names):
+    '''Loads the design of every table the worksheets refer to with a single
+    query in this process. The catalog is passed to the worker processes so
+    they validate against it without connecting to SQL Server themselves.
+
+    :param1 validate_with_sql: str
+    :param2 sql_database: Tuple[str, str]
+    :param3 table_names: List[str]
+
+    :return: schema_catalog.SchemaCatalog
+    '''
+
+    if validate_with_sql == 'SQL' and sql_database is not None:
+        return excel_global.loadSchemaCatalog(sql_database[0], sql_database[1], table_names)
+
+    return None
+
+
+def processWorksheet(worksheet, title, validate_with_sql, sql_database=None, create_scripts=True, sql_file=False, batch_rows=BATCH_ROWS, transaction_batches=TRANSACTION_BATCHES, parameterized=False, sql_schema=None):
+    '''Validates a worksheet and, if it is valid and create_scripts is True,
+    creates its scripts in row order. If sql_file is True the scripts are the
+    statements written to a .sql file, with statements of up to batch_rows
+    rows (or sp_executesql calls if parameterized is True) grouped into
+    transactions of transaction_batches statements, otherwise there is one
+    script per row. Worksheets are validated against sql_schema if it is
+    passed, otherwise against a connection to sql_database.
+
+    :param1 worksheet: excel_reader.Worksheet
+    :param2 title: str
+    :param3 validate_with_sql: str
+    :param4 sql_database: Tuple[str, str]
+    :param5 create_scripts: bool
+    :param6 sql_file: bool
+    :param7 batch_rows: int
+    :param8 transaction_batches: int
+    :param9 parameterized: bool
+    :param10 sql_schema: schema_catalog.SchemaCatalog
+
+    :return: WorksheetResult
+    '''
+
+    start = time.perf_counter()
+    report = ValidationReport()
+    sql_connection = None
+    if sql_schema is None:
+        sql_connection = createSQLConnection(validate_with_sql, sql_database)
+
+    valid_worksheet = excel_global.validateWorksheet(
+        worksheet, validate_with_sql, title, report, sql_connection, sql_schema)
+
+    scripts = []
+    if valid_worksheet and create_scripts and sql_file:
+        scripts = list(script_generator.iterateWorkbookScripts(
+            {title: worksheet}, [title], batch_rows=batch_rows, transaction_batches=transaction_batches, parameterized=parameterized))
+    elif valid_worksheet and create_scripts:
+        scripts = script_generator.writeScripts(worksheet)
+
+    return WorksheetResult(title, valid_worksheet, report.errors, scripts, len(scripts), time.perf_counter() - start)
+
+
+def processWorksheetFile(filename, title, validate_with_sql, sql_database=None, chunk_size=READ_CHUNK_ROWS, script_filename=None, buffer_size=SQL_WRITE_BUFFER_SIZE, batch_rows=BATCH_ROWS, transaction_batches=TRANSACTION_BATCHES, parameterized=False, sql_schema=None):
+    '''Streams one worksheet of an Excel workbook file chunk_size rows at a time
+    and validates it. If script_filename is passed the statements of the
+    worksheet are written to that file as they are created. The worksheet is
+    validated against sql_schema if it is passed, otherwise against a
+    connection to sql_database.
+
+    :param1 filename: str
+    :param2 title: str
+    :param3 validate_with_sql: str
+    :param4 sql_database: Tuple[str, str]
+    :param5 chunk_size: int
+    :param6 script_filename: str
+    :param7 buffer_size: int
+    :param8 batch_rows: int
+    :param9 transaction_batches: int
+    :param10 parameterized: bool
+    :param11 sql_schema: schema_catalog.SchemaCatalog
+
+    :return: WorksheetResult
+    '''
+
+    start = time.perf_counter()
+    report = ValidationReport()
+    sql_connection = None
+    if sql_schema is None:
+        sql_connection = createSQLConnection(validate_with_sql, sql_database)
+
+    def validateWorksheet(worksheet, title):
+        return excel_global.validateWorksheet(worksheet, validate_with_sql, title, report, sql_connection, sql_schema)
+
+    scripts_written = 0
+    if script_filename is None:
+        any_valid_sheets, valid_worksheet = excel_global.validateWorkbookFile(
+            filename, validateWorksheet, report, chunk_size, [title])
+    else:
+        # newlines are not translated so the file can be copied into the final .sql file unchanged
+        with open(script_filename, 'w', newline='\n') as f:
+            scripts_written = script_generator.writeBufferedScripts(f, script_generator.iterateWorkbookFileScripts(
+                filename, validateWorksheet, report, chunk_size, [title], batch_rows=batch_rows, transaction_batches=transaction_batches, parameterized=parameterized), buffer_size)
+        valid_worksheet = not report.hasErrors()
+
+    return WorksheetResult(title, valid_worksheet, report.errors, script_filename, scripts_written, time.perf_counter() - start)
+
+
+def processWorkbook(workbook, worksheets, validate_with_sql, report, workers=WORKSHEET_WORKERS, sql_database=None, create_scripts=True, sql_file=False, batch_rows=BATCH_ROWS, transaction_batches=TRANSACTION_BATCHES, parameterized=False):
+    '''Validates and creates the scripts for each of the passed in worksheets
+    across workers processes. Validation errors are added to the validation
+    report in the order of the worksheets. The design of the SQL tables is
+    loaded once before the worksheets are handed to the workers. See
+    processWorksheet() for the scripts that are created.
+
+    :param1 workbook: dict
+    :param2 worksheets: List[str]
+    :param3 validate_with_sql: str
+    :param4 report: validation_report.ValidationReport
+    :param5 workers: int
+    :param6 sql_database: Tuple[str, str]
+    :param7 create_scripts: bool
+    :param8 sql_file: bool
+    :param9 batch_rows: int
+    :param10 transaction_batches: int
+    :param11 parameterized: bool
+
+    :return: List[WorksheetResult]
+    '''
+
+    sql_schema = loadSchemaCatalog(validate_with_sql, sql_database, schema_catalog.getWorkbookTableNames(
+        {worksheet: workbook[worksheet] for worksheet in worksheets}))
+    results = runInWorkers(processWorksheet, [(workbook[worksheet], worksheet, validate_with_sql, sql_database, create_scripts, sql_file, batch_rows, transaction_batches, parameterized, sql_schema)
+                                              for worksheet in worksheets], workers)
+    for result in results:
+        report.addErrors(result.errors)
+
+    return results
+
+
+def processWorkbookFile(filename, worksheets, validate_with_sql, report, workers=WORKSHEET_WORKERS, sql_database=None, chunk_size=READ_CHUNK_ROWS, directory=None, buffer_size=SQL_WRITE_BUFFER_SIZE, batch_rows=BATCH_ROWS, transaction_batches=TRANSACTION_BATCHES, parameterized=False):
+    '''Streams each of the passed in worksheets of an Excel workbook file across
+    workers processes. If a directory is passed the scripts of each worksheet
+    are written to their own file in it, which iterateScriptFiles() reads back
+    in the order of the worksheets. Validation errors are added to the
+    validation report in the order of the worksheets. The design of the SQL
+    tables is loaded once before the worksheets are handed to the workers.
+
+    :param1 filename: str
+    :param2 worksheets: List[str]
+    :param3 validate_with_sql: str
+    :param4 report: validation_report.ValidationReport
+    :param5 workers: int
+    :param6 sql_database: Tuple[str, str]
+    :param7 chunk_size: int
+    :param8 directory: str
+    :param9 buffer_size: int
+    :param10 batch_rows: int
+    :param11 transaction_batches: int
+    :param12 parameterized: bool
+
+    :return: List[WorksheetResult]
+    '''
+
+    sql_schema = None
+    if validate_with_sql == 'SQL':
+        sql_schema = loadSchemaCatalog(
+            validate_with_sql, sql_database, excel_reader.getTableNames(filename))
+    arguments = []
+    for index, worksheet in enumerate(worksheets):
+        script_filename = None
+        if directory is not None:  # worksheet titles may not be valid file names
+            script_filename = os.path.join(directory, str(index) + '.sql')
+        arguments.append((filename, worksheet, validate_with_sql, sql_database, chunk_size,
+                          script_filename, buffer_size, batch_rows, transaction_batches, parameterized, sql_schema))
+
+    results = runInWorkers(processWorksheetFile, arguments, workers)
+    for result in results:
+        report.addErrors(result.errors)
+
+    return results
+
+
+def iterateScriptFiles(results):
+    '''Lazily yields the scripts written to the script files of the results of
+    processWorkbookFile(), in the order of the worksheets.
+
+    :param1 results: List[WorksheetResult]
+
+    :return: Iterator[str]
+    '''
+
+    for result in results:
+        if result.scripts_written == 0:
+            continue
+        with open(result.scripts, 'r', newline='\n') as f:
+            for line in f:
+                yield line[:-1]
+
+
+def formatWorksheetTimings(results):
+    '''Formats how long each worksheet took to process with one line per
+    worksheet. ex. "Sheet1: valid, 1000 scripts in 0.25 seconds"
+
+    :param1 results: List[WorksheetResult]
+
+    :return: str
+    '''
+
+    lines = []
+    for result in results:
+        status = 'valid' if result.valid else 'invalid'
+        lines.append(result.title + ': ' + status + ', ' + str(result.scripts_written) +
+                     ' scripts in ' + '{:.2f}'.format(result.seconds) + ' seconds')
+
+    return '\n'.join(lines)
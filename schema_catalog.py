@@ -0,0 +1,368 @@
+'''
+Module of 'excel.py' that loads the design of SQL tables. The columns of every
+table a workbook refers to are fetched in a single query and kept in memory,
+indexed by table and column name, so worksheets are validated without a query
+per worksheet. The design is also cached on disk between runs of the program.
+Matt Saffert
+2-12-2020
+'''
+
+from excel_constants import *
+import collections
+import json
+import os
+import tempfile
+import time
+
+
+'''
+The design of one column of a SQL table. type is the name of the column's
+system type without its length. max_length is in characters for string types
+(-1 for max) and None for other types. table is the schema-qualified name.
+ex. ('dbo.IOChannels', 'Name', 3, 'varchar', True, False, 50, 0, 0, None, False)
+'''
+SchemaColumn = collections.namedtuple('SchemaColumn', ['table', 'name', 'ordinal', 'type', 'is_nullable', 'is_identity',
+                                                       'max_length', 'precision', 'scale', 'default', 'is_primary_key'])
+
+'''
+Query that selects the design of every column of the tables whose schema-qualified
+names are in its IN list, in order of table and column position
+'''
+SCHEMA_QUERY = ("SELECT SCHEMA_NAME(t.schema_id) + '.' + t.name, c.name, c.column_id, TYPE_NAME(c.system_type_id), c.is_nullable, c.is_identity, "
+                "COLUMNPROPERTY(c.object_id, c.name, 'charmaxlen'), c.precision, c.scale, dc.definition, "
+                "CASE WHEN ic.column_id IS NULL THEN 0 ELSE 1 END "
+                "FROM sys.tables t "
+                "JOIN sys.columns c ON c.object_id = t.object_id "
+                "LEFT JOIN sys.default_constraints dc ON dc.object_id = c.default_object_id "
+                "LEFT JOIN sys.indexes i ON i.object_id = t.object_id AND i.is_primary_key = 1 "
+                "LEFT JOIN sys.index_columns ic ON ic.object_id = t.object_id AND ic.index_id = i.index_id AND ic.column_id = c.column_id "
+                "WHERE SCHEMA_NAME(t.schema_id) + '.' + t.name IN ({}) "
+                "ORDER BY SCHEMA_NAME(t.schema_id), t.name, c.column_id;")
+
+
+def getQualifiedTableName(table_name):
+    '''Gets the schema-qualified name of a table as it is written in cell A1,
+    without brackets. A name without a schema is in DEFAULT_SQL_SCHEMA.
+    ex. 'IOChannels' is 'dbo.IOChannels' and '[audit].[IOChannels]' is 'audit.IOChannels'
+
+    :param1 table_name: str
+
+    :return: str
+    '''
+
+    names = [name.strip().strip('[]') for name in table_name.rsplit('.', 1)]
+    if len(names) == 1:
+        names.insert(0, DEFAULT_SQL_SCHEMA)
+
+    return '.'.join(names)
+
+
+class SchemaCatalog:
+    '''The columns of SQL tables, indexed by schema-qualified table name and then
+    column name, so tables of the same name in different schemas are kept
+    apart. Tables are looked up by their name in cell A1. Tables that have
+    been looked up but do not exist are remembered so they are not queried
+    again.
+    '''
+
+    def __init__(self):
+        '''Creates an empty catalog.
+        '''
+
+        self.tables = {}
+        self.loaded = set()  # schema-qualified names of every table that has been looked up
+
+    def load(self, cursor, table_names):
+        '''Fetches the columns of the tables that have not been looked up yet in
+        a single query (one per SQL_MAX_PARAMETERS tables) and adds them to
+        the catalog. Names that are not strings (ex. a blank cell) are ignored.
+
+        :param1 cursor: pyodbc.cursor
+        :param2 table_names: List[str]
+
+        :return: SchemaCatalog
+        '''
+
+        table_names = [name for name in dict.fromkeys(getQualifiedTableName(name) for name in table_names
+                                                      if isinstance(name, str)) if name not in self.loaded]
+
+        for start in range(0, len(table_names), SQL_MAX_PARAMETERS):
+            names = table_names[start:start + SQL_MAX_PARAMETERS]
+            cursor.execute(SCHEMA_QUERY.format(
+                ', '.join(['?'] * len(names))), *names)
+            for row in cursor.fetchall():
+                self.addColumn(SchemaColumn(row[0], row[1], row[2], row[3], bool(row[4]), bool(row[5]),
+                                            row[6], row[7], row[8], row[9], bool(row[10])))
+            self.loaded.update(names)
+
+        return self
+
+    def addColumn(self, column):
+        '''Adds a column to the catalog.
+
+        :param1 column: SchemaColumn
+        '''
+
+        self.tables.setdefault(column.table, collections.OrderedDict())[
+            column.name] = column
+        self.loaded.add(column.table)
+
+    def hasTable(self, table_name):
+        '''Checks whether the table exists.
+
+        :param1 table_name: str
+
+        :return: bool
+        '''
+
+        return isinstance(table_name, str) and getQualifiedTableName(table_name) in self.tables
+
+    def getTableNames(self):
+        '''Gets the schema-qualified names of the tables in the catalog.
+
+        :return: List[str]
+        '''
+
+        return list(self.tables)
+
+    def getColumns(self, table_name):
+        '''Gets the columns of a table in the order they are in the table.
+
+        :param1 table_name: str
+
+        :return: List[SchemaColumn]
+        '''
+
+        return list(self.getColumnIndex(table_name).values())
+
+    def getColumnIndex(self, table_name):
+        '''Gets the columns of a table by name.
+
+        :param1 table_name: str
+
+        :return: Dict[str, SchemaColumn]
+        '''
+
+        return self.tables.get(getQualifiedTableName(table_name), {})
+
+    def getTableInfo(self, table_name):
+        '''Gets the names, types, nullability ('YES' or 'NO') and identity (1 or 0)
+        of the columns of a table, the same way as excel_global.getSQLTableInfo().
+
+        :param1 table_name: str
+
+        :return: List[str], List[str], List[str], List[int]
+        '''
+
+        columns = self.getColumns(table_name)
+
+        return ([column.name for column in columns], [column.type for column in columns],
+                ['YES' if column.is_nullable else 'NO' for column in columns],
+                [int(column.is_identity) for column in columns])
+
+
+'''
+Query that selects when each of the tables whose schema-qualified names are in
+its IN list was last changed
+'''
+MODIFY_DATE_QUERY = ("SELECT SCHEMA_NAME(schema_id) + '.' + name, CONVERT(varchar(23), modify_date, 121) "
+                     "FROM sys.tables WHERE SCHEMA_NAME(schema_id) + '.' + name IN ({});")
+
+
+class SchemaCache:
+    '''The design of SQL tables saved to a JSON file, by server, database and
+    schema-qualified table name, with the date each table was last changed in
+    SQL Server and when it was cached. ex. {server: {database: {'dbo.IOChannels': {'modify_date': '2020-02-01 10:00:00.000',
+    'cached': 1581500000.0, 'columns': [[...], ...]}}}}
+    '''
+
+    def __init__(self, filename=SCHEMA_CACHE_FILE, seconds=SCHEMA_CACHE_SECONDS):
+        '''Creates a cache saved to filename. Cached tables are used without
+        checking SQL Server for seconds after they were cached.
+
+        :param1 filename: str
+        :param2 seconds: int
+        '''
+
+        self.filename = filename
+        self.seconds = seconds
+        self.tables = self.read()
+
+    def read(self):
+        '''Reads the cached tables from the file. A missing or unreadable file is
+        an empty cache.
+
+        :return: dict
+        '''
+
+        try:
+            with open(self.filename, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        '''Saves the cached tables to the file. The file is replaced in one step
+        so it is never left half written.
+        '''
+
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as f:
+            json.dump(self.tables, f)
+        os.replace(f.name, self.filename)
+
+    def getTable(self, sql_server_name, sql_database_name, table_name):
+        '''Gets the cached entry of a table, or None if it is not cached.
+
+        :param1 sql_server_name: str
+        :param2 sql_database_name: str
+        :param3 table_name: str
+
+        :return: dict
+        '''
+
+        return self.tables.get(sql_server_name, {}).get(sql_database_name, {}).get(table_name)
+
+    def putTable(self, sql_server_name, sql_database_name, table_name, modify_date, columns):
+        '''Caches the columns of a table as of its modify_date.
+
+        :param1 sql_server_name: str
+        :param2 sql_database_name: str
+        :param3 table_name: str
+        :param4 modify_date: str
+        :param5 columns: List[SchemaColumn]
+        '''
+
+        database = self.tables.setdefault(
+            sql_server_name, {}).setdefault(sql_database_name, {})
+        database[table_name] = {'modify_date': modify_date, 'cached': time.time(),
+                                'columns': [list(column) for column in columns]}
+
+    def load(self, schema_catalog, get_cursor, sql_server_name, sql_database_name, table_names, refresh=False):
+        '''Loads the design of the tables into the schema catalog, from the cache
+        where it is still current and from SQL Server otherwise, and saves what
+        was queried back to the cache. A table cached less than self.seconds
+        ago is used as is. An older one is used if its modify_date in
+        sys.objects has not changed, which is checked for all of them in one
+        query. If refresh is True every table is queried again. get_cursor()
+        is only called if SQL Server has to be queried. If it is None or
+        returns None (offline) only cached tables are loaded, however old
+        they are.
+
+        :param1 schema_catalog: SchemaCatalog
+        :param2 get_cursor: function
+        :param3 sql_server_name: str
+        :param4 sql_database_name: str
+        :param5 table_names: List[str]
+        :param6 refresh: bool
+
+        :return: SchemaCatalog
+        '''
+
+        table_names = [name for name in dict.fromkeys(getQualifiedTableName(name) for name in table_names
+                                                      if isinstance(name, str)) if name not in schema_catalog.loaded]
+        cached = {}
+        for name in table_names:
+            entry = self.getTable(sql_server_name, sql_database_name, name)
+            if entry is not None and not refresh:
+                cached[name] = entry
+
+        now = time.time()
+        check = [name for name in cached if now -
+                 cached[name]['cached'] >= self.seconds]
+        cursor = None
+        if get_cursor is not None and (len(check) > 0 or len(cached) < len(table_names)):
+            cursor = get_cursor()
+
+        if cursor is None:  # offline or nothing to query. use the last snapshot of each table
+            for name in cached:
+                self.addToCatalog(schema_catalog, cached[name])
+            return schema_catalog
+
+        modify_dates = self.getModifyDates(cursor, table_names)
+
+        stale = []
+        for name in table_names:
+            if name in cached and (name not in check or cached[name]['modify_date'] == modify_dates.get(name)):
+                self.addToCatalog(schema_catalog, cached[name])
+                if name in check:  # unchanged. not checked again for another self.seconds
+                    cached[name]['cached'] = now
+            else:
+                stale.append(name)
+
+        schema_catalog.load(cursor, stale)
+        for name in stale:
+            if name in modify_dates:  # tables that do not exist are not cached
+                self.putTable(sql_server_name, sql_database_name, name,
+                              modify_dates[name], schema_catalog.getColumns(name))
+        if len(check) > 0 or len(stale) > 0:
+            self.save()
+
+        return schema_catalog
+
+    def getModifyDates(self, cursor, table_names):
+        '''Gets when each of the tables that exist was last changed, in a single
+        query (one per SQL_MAX_PARAMETERS tables).
+
+        :param1 cursor: pyodbc.cursor
+        :param2 table_names: List[str]
+
+        :return: dict
+        '''
+
+        modify_dates = {}
+        for start in range(0, len(table_names), SQL_MAX_PARAMETERS):
+            names = table_names[start:start + SQL_MAX_PARAMETERS]
+            cursor.execute(MODIFY_DATE_QUERY.format(
+                ', '.join(['?'] * len(names))), *names)
+            modify_dates.update(
+                {row[0]: row[1] for row in cursor.fetchall()})
+
+        return modify_dates
+
+    def addToCatalog(self, schema_catalog, entry):
+        '''Adds the columns of a cached table to the schema catalog.
+
+        :param1 schema_catalog: SchemaCatalog
+        :param2 entry: dict
+        '''
+
+        for column in entry['columns']:
+            schema_catalog.addColumn(SchemaColumn(*column))
+
+
+def createColumnIndex(table_name, sql_column_names, sql_column_types, column_is_nullable, column_is_identity):
+    '''Creates the columns of a table by name from the lists returned by
+    excel_global.getSQLTableInfo(). Lengths, precision, scale, defaults and
+    primary keys are not known.
+
+    :param1 table_name: str
+    :param2 sql_column_names: List[str]
+    :param3 sql_column_types: List[str]
+    :param4 column_is_nullable: List[str]
+    :param5 column_is_identity: List[int]
+
+    :return: Dict[str, SchemaColumn]
+    '''
+
+    columns = collections.OrderedDict()
+    for ordinal, (name, type, is_nullable, is_identity) in enumerate(zip(sql_column_names, sql_column_types, column_is_nullable, column_is_identity)):
+        columns[name] = SchemaColumn(table_name, name, ordinal + 1, type, is_nullable == 'YES', bool(is_identity),
+                                     None, None, None, None, False)
+
+    return columns
+
+
+def getWorkbookTableNames(workbook):
+    '''Gets the table names in cell A1 of each worksheet, in order, without
+    duplicates.
+
+    :param1 workbook: dict
+
+    :return: List[str]
+    '''
+
+    table_names = [workbook[worksheet].header_rows.iloc[INFO_ROW, TABLE_NAME]
+                   for worksheet in workbook if workbook[worksheet].header_rows.shape[1] > 0]
+
+    return [name for name in dict.fromkeys(table_names) if isinstance(name, str)]
@@ -0,0 +1,1318 @@
+'''
+Module of 'excel.py' that handles generating SQL scripts from the data in Excel
+worksheets. Contains no GUI code so it can be used by the command line mode.
+Matt Saffert
+1-9-2020
+'''
+
+from excel_constants import *
+import collections
+import datetime
+import decimal
+import functools
+import itertools
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import excel_global
+import excel_reader
+import numpy as np
+import pandas as pd
+
+
+def shouldInclude(value):
+    '''Checks whether a column of data should be included in the SQL script based on
+    the include row of the excel spreadsheet.
+
+    :param1 value: str
+
+    :return: bool
+    '''
+
+    include = str(value)
+    if include == 'include':
+        return True
+    return False
+
+
+def includeInWhereClause(value):
+    '''Checks whether a column of data should be included in the where clause of the
+    generated SQL script based on the where row of the excel spreadsheet.
+
+    :param1 value: str
+
+    :return: bool
+    '''
+
+    wheres = str(value)
+    if wheres == 'where':
+        return True
+    return False
+
+
+def writeScripts(worksheet, statement_plan=None, workers=SCRIPT_WORKERS, chunk_size=SCRIPT_CHUNK_ROWS):
+    '''Checks the desired type of SQL script to be generated and renders the
+    scripts for every data row of the worksheet using its statement plan, in
+    row order. With more than 1 worker the data rows are split into
+    chunks of chunk_size rows that are rendered in parallel.
+
+    :param1 worksheet: excel_reader.Worksheet
+    :param2 statement_plan: StatementPlan
+    :param3 workers: int
+    :param4 chunk_size: int
+
+    :return: List[str]
+    '''
+
+    if statement_plan is None:
+        statement_plan = StatementPlan(worksheet)
+
+    if statement_plan.script_type not in TYPE_OF_SCRIPTS_AVAILABLE:
+        return []
+
+    data = statement_plan.getDataRows(worksheet)
+    if workers > 1:
+        return list(itertools.chain.from_iterable(renderChunks(
+            statement_plan, splitDataRows(data, chunk_size), workers, renderRowChunk)))
+
+    return statement_plan.renderColumns(data).tolist()
+
+
+def iterateScripts(worksheet, statement_plan=None, chunk_size=SCRIPT_CHUNK_ROWS, workers=SCRIPT_WORKERS):
+    '''Lazily yields the statements written to a .sql file for the data rows
+    of the worksheet, in row order. Rows are rendered chunk_size rows at a time
+    so only a few chunks of scripts are held in memory.
+
+    :param1 worksheet: excel_reader.Worksheet
+    :param2 statement_plan: StatementPlan
+    :param3 chunk_size: int
+    :param4 workers: int
+
+    :return: Iterator[str]
+    '''
+
+    if statement_plan is None:
+        statement_plan = StatementPlan(worksheet)
+
+    if statement_plan.script_type in TYPE_OF_SCRIPTS_AVAILABLE:
+        data = statement_plan.getDataRows(worksheet)
+        # chunks hold whole batches so every INSERT statement but the last is full
+        chunk_size = max(chunk_size - chunk_size %
+                         statement_plan.batch_rows, statement_plan.batch_rows)
+        for scripts in renderChunks(statement_plan, splitDataRows(data, chunk_size), workers):
+            for script in scripts:
+                yield script
+
+
+def splitDataRows(data, chunk_size=SCRIPT_CHUNK_ROWS):
+    '''Lazily splits rows of data into contiguous chunks of chunk_size rows.
+
+    :param1 data: pandas.core.frame.DataFrame
+    :param2 chunk_size: int
+
+    :return: Iterator[pandas.core.frame.DataFrame]
+    '''
+
+    for start in range(0, len(data), chunk_size):
+        yield data.iloc[start:start + chunk_size]
+
+
+def renderChunk(statement_plan, data):
+    '''Renders the statements for a chunk of data rows. Called in worker
+    processes so the statement plan is compiled once and shared with every
+    chunk.
+
+    :param1 statement_plan: StatementPlan
+    :param2 data: pandas.core.frame.DataFrame
+
+    :return: List[str]
+    '''
+
+    return statement_plan.renderStatements(data)
+
+
+def renderRowChunk(statement_plan, data):
+    '''Renders the script of each row in a chunk of data rows, for the scripts
+    column of a worksheet. Called in worker processes.
+
+    :param1 statement_plan: StatementPlan
+    :param2 data: pandas.core.frame.DataFrame
+
+    :return: List[str]
+    '''
+
+    return statement_plan.renderColumns(data).tolist()
+
+
+def renderChunks(statement_plan, chunks, workers=SCRIPT_WORKERS, render_chunk=renderChunk):
+    '''Lazily renders each chunk of data rows with render_chunk(statement_plan,
+    chunk) and yields its scripts, in the order of the chunks. With more than 1
+    worker the chunks are rendered in parallel, with at most 2 chunks per
+    worker waiting to be yielded so memory use does not grow with the number
+    of chunks.
+
+    :param1 statement_plan: StatementPlan
+    :param2 chunks: Iterable[pandas.core.frame.DataFrame]
+    :param3 workers: int
+    :param4 render_chunk: function
+
+    :return: Iterator[List[str]]
+    '''
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield render_chunk(statement_plan, chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(executor.submit(
+                render_chunk, statement_plan, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while len(pending) > 0:
+            yield pending.popleft().result()
+
+
+class StatementPlan:
+    '''Compiled plan of the scripts for a worksheet. The header rows (table name,
+    script type, names, types, include, where) are resolved once into ordered
+    include and where columns and the text around their values, so rendering
+    is done a whole column at a time.
+
+    Each planned column is a tuple of (column index, column name, needs quotes).
+    Values are written as literals by the formatter of their column's SQL type,
+    which is looked up once per column.
+    Plans for .sql files may write batch_rows rows with each statement: a
+    multi-row INSERT, a SELECT with an IN list, or a set-based UPDATE, DELETE
+    or SELECT joined to the rows as a VALUES table. Plans also hold a
+    parameterized statement so rows can be sent to a database as typed
+    parameters, or written as sp_executesql calls if parameterized is True.
+    '''
+
+    def __init__(self, worksheet, batch_rows=1, parameterized=False):
+        '''Builds the statement plan from the header rows of the worksheet.
+
+        :param1 worksheet: excel_reader.Worksheet
+        :param2 batch_rows: int
+        :param3 parameterized: bool
+        '''
+
+        header_rows = worksheet.header_rows
+        self.table_name = str(header_rows.loc['info'][TABLE_NAME])
+        self.script_type = header_rows.loc['info'][SCRIPT_TYPE]
+        self.include_columns = []
+        self.where_columns = []
+        self.column_types = [str(value) for value in header_rows.loc['types']]
+        self.sql_types = [getSqlType(value) for value in self.column_types]
+        self.literal_formatters = [getLiteralFormatter(value)
+                                   for value in self.column_types]
+        self.parameterized = parameterized
+
+        for i in range(len(header_rows.loc['names'])):
+            column = (i, str(header_rows.loc['names'][i]),
+                      self.sql_types[i].quoted)
+            if shouldInclude(header_rows.loc['include'][i]):
+                self.include_columns.append(column)
+            if includeInWhereClause(header_rows.loc['where'][i]):
+                self.where_columns.append(column)
+
+        self.batch_start, self.batch_end, self.batch_columns, self.batch_row_brackets = self.createBatchTemplate()
+        self.parameterized_statement, self.parameter_columns = self.createParameterizedStatement()
+        self.parameter_types = [self.column_types[column[0]]
+                                for column in self.parameter_columns]
+        # values are converted with the function for their column's SQL type
+        self.parameter_converters = [getParameterConverter(column_type)
+                                     for column_type in self.parameter_types]
+        self.execute_sql_start = self.createExecuteSQLTemplate()
+        self.batch_rows = 1
+        if self.batch_start is not None and not parameterized:
+            self.batch_rows = getBatchRows(
+                batch_rows, len(self.batch_columns))
+
+    def createBatchTemplate(self):
+        '''Creates the text before and after the rows of values of a statement
+        that writes a batch of rows, the columns of each row of values and the
+        brackets around each row. The values of a column that is both included
+        and in the where clause are only written once. Returns None for each if
+        the script type cannot be batched, or an update, delete or select has no
+        where clause to match the rows on.
+
+        ex. UPDATE target SET b = src.b FROM t AS target JOIN (VALUES
+            (1, 'x'),
+            (2, 'y')) AS src (a, b) ON target.a = src.a;
+
+        :return: str, str, List[tuple], Tuple[str, str]
+        '''
+
+        if self.script_type == 'insert':
+            batch_start = 'INSERT INTO ' + self.table_name + ' (' + ', '.join(
+                [column[1] for column in self.include_columns]) + ') VALUES\n'
+            return batch_start, ';', self.include_columns, ('(', ')')
+
+        if len(self.where_columns) == 0 or self.script_type not in ['update', 'delete', 'select']:
+            return None, None, None, None
+
+        if self.script_type == 'select' and len(self.where_columns) == 1:
+            # ex. SELECT (a, b) FROM t WHERE c IN (1, 2, 3);
+            batch_start = 'SELECT (' + ', '.join([column[1] for column in self.include_columns]) + ') FROM ' + \
+                self.table_name + ' WHERE ' + \
+                self.where_columns[0][1] + ' IN (\n'
+            return batch_start, ');', self.where_columns, ('', '')
+
+        if self.script_type == 'update':
+            where_indexes = [column[0] for column in self.where_columns]
+            batch_columns = self.where_columns + \
+                [column for column in self.include_columns if column[0]
+                    not in where_indexes]
+            batch_start = 'UPDATE target SET ' + ', '.join([column[1] + ' = src.' + column[1]
+                                                           for column in self.include_columns]) + ' FROM '
+        elif self.script_type == 'delete':
+            batch_columns = self.where_columns
+            batch_start = 'DELETE target FROM '
+        else:  # select with more than one where column
+            batch_columns = self.where_columns
+            batch_start = 'SELECT (' + ', '.join(['target.' + column[1]
+                                                  for column in self.include_columns]) + ') FROM '
+        batch_start += self.table_name + ' AS target JOIN (VALUES\n'
+        batch_end = ') AS src (' + ', '.join([column[1] for column in batch_columns]) + ') ON ' + \
+            ' AND '.join(['target.' + column[1] + ' = src.' + column[1]
+                          for column in self.where_columns]) + ';'
+
+        return batch_start, batch_end, batch_columns, ('(', ')')
+
+    def createParameterizedStatement(self, named=False):
+        '''Creates the statement with a ? parameter marker in place of each
+        value, and the columns whose values fill the parameters, in order. If
+        named is True the markers are @p1, @p2, ... as used by sp_executesql.
+
+        ex. INSERT INTO t (a, b) VALUES (?, ?)
+
+        :param1 named: bool
+
+        :return: str, List[tuple]
+        '''
+
+        if self.script_type == 'insert':
+            parameter_columns = self.include_columns
+        elif self.script_type == 'update':
+            parameter_columns = self.include_columns + self.where_columns
+        else:  # delete, select
+            parameter_columns = self.where_columns
+
+        markers = ['@p' + str(i + 1) if named else '?'
+                   for i in range(len(parameter_columns))]
+        include_markers = markers[:len(self.include_columns)]
+        where_markers = markers[len(markers) - len(self.where_columns):]
+
+        column_names = ', '.join([column[1]
+                                  for column in self.include_columns])
+        where_clause = ''
+        if len(self.where_columns) > 0:
+            where_clause = ' WHERE ' + ' AND '.join([column[1] + ' = ' + marker
+                                                     for column, marker in zip(self.where_columns, where_markers)])
+
+        if self.script_type == 'insert':
+            statement = 'INSERT INTO ' + self.table_name + ' (' + column_names + ') VALUES (' + \
+                ', '.join(include_markers) + ')'
+        elif self.script_type == 'update':
+            statement = 'UPDATE ' + self.table_name + ' SET ' + ', '.join([column[1] + ' = ' + marker
+                                                                           for column, marker in zip(self.include_columns, include_markers)]) + where_clause
+        elif self.script_type == 'delete':
+            statement = 'DELETE FROM ' + self.table_name + where_clause
+        else:  # select
+            statement = 'SELECT (' + column_names + ') FROM ' + \
+                self.table_name + where_clause
+
+        return statement, parameter_columns
+
+    def createExecuteSQLTemplate(self):
+        '''Creates the start of the sp_executesql call shared by every row: the
+        statement with named parameters and the declarations of the parameters.
+        The statement text is the same for every row so SQL Server compiles one
+        plan for the worksheet.
+
+        ex. EXEC sp_executesql N'DELETE FROM t WHERE a = @p1', N'@p1 int'
+
+        :return: str
+        '''
+
+        statement, parameter_columns = self.createParameterizedStatement(
+            named=True)
+        declarations = ', '.join(['@p' + str(i + 1) + ' ' + getParameterDeclaration(column_type)
+                                  for i, column_type in enumerate(self.parameter_types)])
+
+        return "EXEC sp_executesql N'" + statement.replace("'", "''") + "', N'" + declarations + "'"
+
+    def renderExecuteSQL(self, data):
+        '''Renders an sp_executesql call for each row of data with the values
+        of the row passed as named parameters. Missing values are passed as
+        NULL.
+
+        ex. EXEC sp_executesql N'DELETE FROM t WHERE a = @p1', N'@p1 int', @p1 = 7;
+
+        :param1 data: pandas.core.frame.DataFrame
+
+        :return: pandas.core.series.Series
+        '''
+
+        values = ['@p' + str(i + 1) + ' = ' + self.formatColumn(data, column)
+                  for i, column in enumerate(self.parameter_columns)]
+        if len(values) == 0:
+            return pd.Series(self.execute_sql_start + ';', index=data.index, dtype=object)
+
+        return self.execute_sql_start + ', ' + joinColumnValues(data, values, ', ') + ';'
+
+    def getParameterRows(self, data):
+        '''Gets the values of the parameters of the parameterized statement for
+        each row of data, converted to the Python type of their column's SQL
+        type. Missing values become None (NULL).
+
+        :param1 data: pandas.core.frame.DataFrame
+
+        :return: List[tuple]
+        '''
+
+        columns = []
+        for column, converter in zip(self.parameter_columns, self.parameter_converters):
+            values = data.iloc[:, column[0]]
+            columns.append([None if missing else converter(value)
+                            for value, missing in zip(values, values.isna())])
+
+        if len(columns) == 0:
+            return [()] * len(data)
+
+        return list(zip(*columns))
+
+    def validateParameterValues(self, data, report, title):
+        '''Checks that every value of the parameters of each row of data can be
+        converted to the Python type of its column's SQL type, the same way
+        getParameterRows() converts it. Each value that cannot is added to the
+        validation report with its cell, so that no row of the worksheet is
+        sent when one of them would fail. Columns the reader cast to a native
+        dtype always convert and are not checked.
+
+        :param1 data: pandas.core.frame.DataFrame
+        :param2 report: validation_report.ValidationReport
+        :param3 title: str
+
+        :return: bool
+        '''
+
+        valid_values = True
+        for column, column_type, converter in zip(self.parameter_columns, self.parameter_types, self.parameter_converters):
+            values = data.iloc[:, column[0]]
+            if values.dtype != object:
+                continue
+            for row, value, missing in zip(data.index, values, values.isna()):
+                if missing:
+                    continue
+                try:
+                    converter(value)
+                except (ValueError, TypeError, ArithmeticError) as e:
+                    valid_values = False
+                    excel_cell = excel_global.getExcelCellToInsertInto(
+                        column[0], row + START_OF_DATA_ROWS_INDEX)
+                    report.addError(PARAMETER_VALUE_ERROR, title, excel_cell, 'The value in cell ' + excel_cell +
+                                    ' cannot be converted to its column type ' + column_type + ': ' + str(e))
+
+        return valid_values
+
+    def getDataRows(self, worksheet):
+        '''Gets the rows of data that scripts will be written for. The reader
+        has already cast each column to the native dtype of its SQL type, so
+        the rows are not copied.
+
+        :param1 worksheet: excel_reader.Worksheet
+
+        :return: pandas.core.frame.DataFrame
+        '''
+
+        # blank rows at the end of the worksheet are dropped by the reader. a
+        # blank row here is between rows of data and is validated like any other
+        return worksheet.data
+
+    def formatColumn(self, data, column):
+        '''Formats a whole column of data as the literals written into the
+        scripts, with the literal formatter of the column's SQL type.
+
+        :param1 data: pandas.core.frame.DataFrame
+        :param2 column: tuple
+
+        :return: pandas.core.series.Series
+        '''
+
+        return formatColumnValues(data, column, self.literal_formatters[column[0]])
+
+    def renderColumns(self, data):
+        '''Renders the scripts for every row of data at once using whole column
+        string operations.
+
+        :param1 data: pandas.core.frame.DataFrame
+
+        :return: pandas.core.series.Series
+        '''
+
+        if self.script_type == 'insert':
+            values = [self.formatColumn(data, column)
+                      for column in self.include_columns]
+            return 'INSERT INTO ' + self.table_name + ' (' + ', '.join([column[1] for column in self.include_columns]) + \
+                ') VALUES (' + joinColumnValues(data, values, ', ') + ');'
+
+        where_clause = pd.Series(';', index=data.index, dtype=object)
+        if len(self.where_columns) > 0:
+            where_values = [column[1] + ' = ' + self.formatColumn(data, column)
+                            for column in self.where_columns]
+            where_clause = ' WHERE ' + \
+                joinColumnValues(data, where_values, '  AND  ') + ';'
+
+        if self.script_type == 'update':
+            values = [column[1] + ' = ' + self.formatColumn(data, column)
+                      for column in self.include_columns]
+            return 'UPDATE ' + self.table_name + ' SET ' + joinColumnValues(data, values, ', ') + where_clause
+        elif self.script_type == 'delete':
+            return 'DELETE FROM ' + self.table_name + where_clause
+        else:  # select
+            return 'SELECT (' + ', '.join([column[1] for column in self.include_columns]) + ') FROM ' + \
+                self.table_name + where_clause
+
+    def renderStatements(self, data):
+        '''Renders the statements written to a .sql file for the rows of data.
+        Parameterized plans write an sp_executesql call per row. Plans with
+        more than 1 batch row write batch_rows rows with each statement,
+        otherwise there is one statement per row.
+
+        :param1 data: pandas.core.frame.DataFrame
+
+        :return: List[str]
+        '''
+
+        if self.parameterized:
+            return self.renderExecuteSQL(data).tolist()
+        if self.batch_rows <= 1:
+            return self.renderColumns(data).tolist()
+
+        # ex. "('a', 1)"
+        values = [self.formatColumn(data, column)
+                  for column in self.batch_columns]
+        rows = (self.batch_row_brackets[0] + joinColumnValues(data, values,
+                                                              ', ') + self.batch_row_brackets[1]).tolist()
+
+        return [self.batch_start + ',\n'.join(rows[start:start + self.batch_rows]) + self.batch_end
+                for start in range(0, len(rows), self.batch_rows)]
+
+
+def getBatchRows(batch_rows, number_of_columns):
+    '''Gets the number of rows each statement can write without going over
+    SQL Server's limits on the rows in a VALUES list and the parameters in a
+    statement.
+
+    :param1 batch_rows: int
+    :param2 number_of_columns: int
+
+    :return: int
+    '''
+
+    max_rows = min(SQL_MAX_INSERT_ROWS,
+                   SQL_MAX_PARAMETERS // max(number_of_columns, 1))
+
+    return max(1, min(batch_rows, max_rows))
+
+
+def convertToBit(value):
+    '''Converts a value of a bit column to a bool. ex. 'True' -> True, 0 -> False
+
+    :param1 value: ?
+
+    :return: bool
+    '''
+
+    if isinstance(value, str):
+        return value.strip().lower() in ['true', '1', 'yes']
+
+    return bool(value)
+
+
+def convertToInteger(value):
+    '''Converts a value of an integer column to an int. Raises a ValueError
+    if the value is not a whole number instead of truncating it.
+    ex. 5.0 -> 5, '12' -> 12, 5.5 -> ValueError
+
+    :param1 value: ?
+
+    :return: int
+    '''
+
+    try:
+        number = decimal.Decimal(str(value).strip())
+    except decimal.InvalidOperation:
+        number = None
+    if number is None or not number.is_finite() or number != number.to_integral_value():
+        raise ValueError("'" + str(value) + "' is not a whole number")
+
+    return int(number)
+
+
+def convertToBinary(value):
+    '''Converts a value of a binary column written as hex (ex. '0x1F') to bytes.
+    Other values are passed through unchanged.
+
+    :param1 value: ?
+
+    :return: bytes
+    '''
+
+    if isinstance(value, str) and value.lower().startswith('0x'):
+        return bytes.fromhex(value[2:])
+
+    return value
+
+
+def convertToDecimal(value):
+    '''Converts a value of a decimal/numeric/money column to a Decimal without
+    going through a binary float.
+
+    :param1 value: ?
+
+    :return: decimal.Decimal
+    '''
+
+    return decimal.Decimal(str(value))
+
+
+def convertToDatetime(value):
+    '''Converts a value of a date/time column to a datetime.
+
+    :param1 value: ?
+
+    :return: datetime.datetime
+    '''
+
+    return pd.Timestamp(value).to_pydatetime()
+
+
+def convertToDate(value):
+    '''Converts a value of a date column to a date.
+
+    :param1 value: ?
+
+    :return: datetime.date
+    '''
+
+    return convertToDatetime(value).date()
+
+
+def convertToTime(value):
+    '''Converts a value of a time column to a time.
+
+    :param1 value: ?
+
+    :return: datetime.time
+    '''
+
+    if isinstance(value, datetime.time):
+        return value
+
+    return convertToDatetime(value).time()
+
+
+def convertUnchanged(value):
+    '''Passes a value of a type with no conversion through unchanged.
+
+    :param1 value: ?
+
+    :return: ?
+    '''
+
+    return value
+
+
+'''
+Functions that convert a value to the Python type sent as a parameter for a SQL
+type, by the SqlType base name. Types not in the dict are sent unchanged
+'''
+PARAMETER_CONVERTERS = {
+    'bit': convertToBit,
+    'tinyint': convertToInteger,
+    'smallint': convertToInteger,
+    'int': convertToInteger,
+    'bigint': convertToInteger,
+    'decimal': convertToDecimal,
+    'numeric': convertToDecimal,
+    'smallmoney': convertToDecimal,
+    'money': convertToDecimal,
+    'float': float,
+    'real': float,
+    'char': str,
+    'varchar': str,
+    'text': str,
+    'nchar': str,
+    'nvarchar': str,
+    'ntext': str,
+    'binary': convertToBinary,
+    'varbinary': convertToBinary,
+    'image': convertToBinary,
+    'datetime': convertToDatetime,
+    'datetime2': convertToDatetime,
+    'smalldatetime': convertToDatetime,
+    'date': convertToDate,
+    'time': convertToTime
+}
+
+
+def getParameterConverter(type):
+    '''Gets the function that converts the values of a column of the SQL type
+    to the Python type sent as a parameter.
+
+    :param1 type: str
+
+    :return: function
+    '''
+
+    return PARAMETER_CONVERTERS.get(getSqlType(type).base, convertUnchanged)
+
+
+'''
+Declarations used for sp_executesql parameters of types that need a length,
+precision or scale when the types row gives none. ex. 'varchar' -> 'varchar(max)'.
+A bare decimal or numeric is decimal(18,0) in SQL Server, which would drop the
+fraction of every value, so they are declared wide enough for any column
+'''
+PARAMETER_DECLARATIONS = {
+    'decimal': 'decimal(38,10)',
+    'numeric': 'numeric(38,10)',
+    'char': 'varchar(max)',
+    'varchar': 'varchar(max)',
+    'text': 'varchar(max)',
+    'nchar': 'nvarchar(max)',
+    'nvarchar': 'nvarchar(max)',
+    'ntext': 'nvarchar(max)',
+    'binary': 'varbinary(max)',
+    'varbinary': 'varbinary(max)',
+    'image': 'varbinary(max)'
+}
+
+
+def getParameterDeclaration(type):
+    '''Gets the type a sp_executesql parameter of the SQL type is declared
+    with. Types written with a length are declared as written.
+
+    :param1 type: str
+
+    :return: str
+    '''
+
+    type = str(type).strip()
+    if '(' in type:
+        return type
+
+    return PARAMETER_DECLARATIONS.get(getSqlType(type).base, type)
+
+
+def formatColumnValues(data, column, formatter):
+    '''Converts a whole column of data to the SQL literals written into the
+    scripts with the literal formatter of the column's type. Missing values
+    are written as NULL.
+
+    :param1 data: pandas.core.frame.DataFrame
+    :param2 column: tuple
+    :param3 formatter: function
+
+    :return: pandas.core.series.Series
+    '''
+
+    values = data.iloc[:, column[0]]
+    missing = values.isna()
+    if not missing.any():
+        return formatter(values)
+
+    literals = pd.Series('NULL', index=values.index, dtype=object)
+    literals[~missing] = formatter(values[~missing])
+
+    return literals
+
+
+def formatStringLiteral(value):
+    '''Formats a value of a string (or other quoted) type as a quoted literal,
+    doubling the quotes inside it. ex. "O'Brien" -> "'O''Brien'"
+
+    :param1 value: ?
+
+    :return: str
+    '''
+
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def quoteLiterals(values, prefix=''):
+    '''Puts quotes around a whole column of strings the same way as
+    formatStringLiteral().
+
+    :param1 values: pandas.core.series.Series
+    :param2 prefix: str
+
+    :return: pandas.core.series.Series
+    '''
+
+    return prefix + "'" + values.astype(str).str.replace("'", "''", regex=False) + "'"
+
+
+def formatStringLiterals(values):
+    '''Formats a column of a string (or other quoted) type as quoted literals.
+    ex. 'Charger 7-1 IO' -> "'Charger 7-1 IO'"
+
+    :param1 values: pandas.core.series.Series
+
+    :return: pandas.core.series.Series
+    '''
+
+    return quoteLiterals(values)
+
+
+def formatUnicodeLiterals(values):
+    '''Formats a column of a Unicode string type as N'' literals.
+
+    :param1 values: pandas.core.series.Series
+
+    :return: pandas.core.series.Series
+    '''
+
+    return quoteLiterals(values, 'N')
+
+
+'''
+Text of numbers read as floats that is written without the '.0' in bit columns
+'''
+BIT_FLOAT_TEXT = {'1.0': '1', '0.0': '0'}
+
+
+def formatBitLiterals(values):
+    '''Formats a column of a bit type as quoted 'True'/'False' (or '1'/'0')
+    literals. Numbers read as floats lose their '.0'. ex. 1.0 -> "'1'"
+
+    :param1 values: pandas.core.series.Series
+
+    :return: pandas.core.series.Series
+    '''
+
+    return quoteLiterals(values.astype(str).replace(BIT_FLOAT_TEXT))
+
+
+def formatIntegerLiteral(value):
+    '''Formats a value of an integer type. Whole numbers read as floats lose
+    their '.0' and bools are written as 1/0. ex. 5.0 -> '5'
+
+    :param1 value: ?
+
+    :return: str
+    '''
+
+    if isinstance(value, (bool, np.bool_)):
+        return str(int(value))
+    elif isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return str(int(value))
+
+    return str(value)
+
+
+def formatIntegerLiterals(values):
+    '''Formats a column of an integer type. Columns that are all whole numbers
+    are converted in one step, other columns one value at a time with
+    formatIntegerLiteral().
+
+    :param1 values: pandas.core.series.Series
+
+    :return: pandas.core.series.Series
+    '''
+
+    if not pd.api.types.is_integer_dtype(values):
+        try:
+            numbers = pd.to_numeric(values)
+        except (TypeError, ValueError):
+            numbers = values
+        if not pd.api.types.is_integer_dtype(numbers):
+            return values.map(formatIntegerLiteral)
+        values = numbers
+
+    return values.astype(str)
+
+
+def formatDecimalLiteral(value):
+    '''Formats a value of a decimal/numeric/money type without an exponent and
+    without going through more digits than the float it was read as.
+    ex. 1e-05 -> '0.00001'
+
+    :param1 value: ?
+
+    :return: str
+    '''
+
+    if isinstance(value, (float, np.floating)):
+        value = decimal.Decimal(repr(float(value)))
+    if isinstance(value, decimal.Decimal) and value.is_finite():
+        return format(value, 'f')
+
+    return str(value)
+
+
+def formatDecimalLiterals(values):
+    '''Formats a column of a decimal/numeric/money type.
+
+    :param1 values: pandas.core.series.Series
+
+    :return: pandas.core.series.Series
+    '''
+
+    if pd.api.types.is_integer_dtype(values):
+        return values.astype(str)
+
+    return values.map(formatDecimalLiteral)
+
+
+def formatBinaryLiteral(value):
+    '''Formats a value of a binary type as a 0x hex literal. Values already
+    written as hex are kept and text is written as its UTF-8 bytes.
+    ex. b'\x1f' -> '0x1F', '0x1F' -> '0x1F'
+
+    :param1 value: ?
+
+    :return: str
+    '''
+
+    if isinstance(value, (bytes, bytearray)):
+        return '0x' + bytes(value).hex().upper()
+
+    value = str(value)
+    if value.lower().startswith('0x'):
+        return value
+
+    return '0x' + value.encode('utf-8').hex().upper()
+
+
+def formatBinaryLiterals(values):
+    '''Formats a column of a binary type as 0x hex literals.
+
+    :param1 values: pandas.core.series.Series
+
+    :return: pandas.core.series.Series
+    '''
+
+    return values.map(formatBinaryLiteral)
+
+
+'''
+strftime() format of the ISO-8601 literals of each date/time type, and the
+number of characters of it that are kept. datetime is only accurate to the
+millisecond and smalldatetime to the minute.
+'''
+DATETIME_LITERAL_FORMATS = {
+    'datetime': ('%Y-%m-%dT%H:%M:%S.%f', 23),
+    'smalldatetime': ('%Y-%m-%dT%H:%M:%S', 19),
+    'datetime2': ('%Y-%m-%dT%H:%M:%S.%f', 26),
+    'date': ('%Y-%m-%d', 10),
+    'time': ('%H:%M:%S.%f', 15)
+}
+
+
+def formatDatetimeValue(value, base):
+    '''Formats a value of a date/time type as the text of an ISO-8601 literal,
+    which SQL Server reads the same whatever its language and date format
+    settings. datetimeoffset values keep their UTC offset. Text is kept as it
+    was written.
+    ex. datetime2 datetime(2020, 2, 1, 10, 30) -> '2020-02-01T10:30:00.000000'
+
+    :param1 value: ?
+    :param2 base: str
+
+    :return: str
+    '''
+
+    if not isinstance(value, (datetime.date, datetime.time)):
+        return str(value)
+    if isinstance(value, pd.Timestamp):
+        value = value.to_pydatetime()
+    if base == 'datetimeoffset':
+        return value.isoformat()
+    if isinstance(value, datetime.time) and base != 'time':
+        return str(value)
+
+    literal_format, length = DATETIME_LITERAL_FORMATS[base]
+
+    return value.strftime(literal_format)[:length]
+
+
+def formatDatetimeLiteral(value, base):
+    '''Formats a value of a date/time type as a quoted ISO-8601 literal.
+
+    :param1 value: ?
+    :param2 base: str
+
+    :return: str
+    '''
+
+    return formatStringLiteral(formatDatetimeValue(value, base))
+
+
+def formatDatetimeLiterals(values, base):
+    '''Formats a column of a date/time type as quoted ISO-8601 literals. Columns
+    read as datetimes are converted in one step.
+
+    :param1 values: pandas.core.series.Series
+    :param2 base: str
+
+    :return: pandas.core.series.Series
+    '''
+
+    if pd.api.types.is_datetime64_dtype(values) and base in DATETIME_LITERAL_FORMATS:
+        literal_format, length = DATETIME_LITERAL_FORMATS[base]
+        return quoteLiterals(values.dt.strftime(literal_format).str[:length])
+
+    return values.map(functools.partial(formatDatetimeLiteral, base=base))
+
+
+def formatUnchangedLiterals(values):
+    '''Formats a column of a type with no literal formatter (ex. float, or an
+    unsupported type) as its text, without quotes.
+
+    :param1 values: pandas.core.series.Series
+
+    :return: pandas.core.series.Series
+    '''
+
+    return values.astype(str)
+
+
+def createDatetimeFormatter(base):
+    '''Creates the literal formatter of a date/time type. A partial is used so
+    the formatter can be sent to worker processes.
+
+    :param1 base: str
+
+    :return: function
+    '''
+
+    return functools.partial(formatDatetimeLiterals, base=base)
+
+
+'''
+Literal formatters of quoted types with no formatter of their own and of types
+written as their text
+'''
+STRING_LITERAL_FORMATTER = formatStringLiterals
+UNCHANGED_LITERAL_FORMATTER = formatUnchangedLiterals
+
+'''
+Literal formatters of SQL types, by the SqlType base name. Other supported
+types are written as quoted strings and unsupported types as their text
+'''
+LITERAL_FORMATTERS = {
+    'bit': formatBitLiterals,
+    'tinyint': formatIntegerLiterals,
+    'smallint': formatIntegerLiterals,
+    'int': formatIntegerLiterals,
+    'bigint': formatIntegerLiterals,
+    'decimal': formatDecimalLiterals,
+    'numeric': formatDecimalLiterals,
+    'smallmoney': formatDecimalLiterals,
+    'money': formatDecimalLiterals,
+    'float': UNCHANGED_LITERAL_FORMATTER,
+    'real': UNCHANGED_LITERAL_FORMATTER,
+    'nchar': formatUnicodeLiterals,
+    'nvarchar': formatUnicodeLiterals,
+    'ntext': formatUnicodeLiterals,
+    'binary': formatBinaryLiterals,
+    'varbinary': formatBinaryLiterals,
+    'image': formatBinaryLiterals,
+    'datetime': createDatetimeFormatter('datetime'),
+    'datetime2': createDatetimeFormatter('datetime2'),
+    'smalldatetime': createDatetimeFormatter('smalldatetime'),
+    'date': createDatetimeFormatter('date'),
+    'time': createDatetimeFormatter('time'),
+    'datetimeoffset': createDatetimeFormatter('datetimeoffset')
+}
+
+
+def getLiteralFormatter(type):
+    '''Gets the function that formats a column of values of the SQL type as
+    literals.
+
+    :param1 type: str
+
+    :return: function
+    '''
+
+    sql_type = getSqlType(type)
+    if not sql_type.supported:
+        return UNCHANGED_LITERAL_FORMATTER
+
+    return LITERAL_FORMATTERS.get(sql_type.base, STRING_LITERAL_FORMATTER)
+
+
+def joinColumnValues(data, columns, separator):
+    '''Joins the formatted string columns element-wise with the separator.
+
+    :param1 data: pandas.core.frame.DataFrame
+    :param2 columns: List[pandas.core.series.Series]
+    :param3 separator: str
+
+    :return: pandas.core.series.Series
+    '''
+
+    if len(columns) == 0:
+        return pd.Series('', index=data.index, dtype=object)
+
+    joined = columns[0]
+    for column in columns[1:]:
+        joined = joined + separator + column
+
+    return joined
+
+
+def addScriptsColumn(worksheet, statement_plan=None, workers=SCRIPT_WORKERS):
+    '''Creates the scripts for the worksheet and writes them to a new "scripts"
+    column next to the data they were created from.
+
+    :param1 worksheet: excel_reader.Worksheet
+    :param2 statement_plan: StatementPlan
+    :param3 workers: int
+
+    :return: NONE
+    '''
+
+    # returns the script of each data row in row order
+    scripts = writeScripts(worksheet, statement_plan, workers)
+
+    setScriptsColumn(worksheet, scripts)
+
+
+def setScriptsColumn(worksheet, scripts):
+    '''Writes the scripts of the worksheet's data rows, in row order, to a new
+    "scripts" column next to the data they were created from.
+
+    :param1 worksheet: excel_reader.Worksheet
+    :param2 scripts: Iterable[str]
+
+    :return: NONE
+    '''
+
+    # writes script to worksheet. the header is in the second header row
+    worksheet.header_rows['scripts'] = ['', 'Scripts', '', '', '']
+    worksheet.data['scripts'] = list(scripts)
+
+
+def writeBufferedScripts(f, scripts, buffer_size=SQL_WRITE_BUFFER_SIZE):
+    '''Writes each script on its own line to an open file. Scripts are held in
+    a buffer that is flushed to the file in one write once it holds buffer_size
+    characters, so memory use does not grow with the number of scripts.
+
+    :param1 f: io.TextIOBase
+    :param2 scripts: Iterable[str]
+    :param3 buffer_size: int
+
+    :return: int
+    '''
+
+    buffer = []
+    buffered_characters = 0
+    scripts_written = 0
+
+    for script in scripts:
+        buffer.append(script + '\n')
+        buffered_characters += len(script) + 1
+        scripts_written += 1
+        if buffered_characters >= buffer_size:
+            f.write(''.join(buffer))
+            buffer = []
+            buffered_characters = 0
+    f.write(''.join(buffer))
+
+    return scripts_written
+
+
+def iterateTransactions(scripts, transaction_batches=TRANSACTION_BATCHES):
+    '''Lazily yields the scripts with every transaction_batches of them wrapped
+    between BEGIN TRANSACTION and COMMIT TRANSACTION. If transaction_batches is
+    0 the scripts are yielded unchanged.
+
+    :param1 scripts: Iterable[str]
+    :param2 transaction_batches: int
+
+    :return: Iterator[str]
+    '''
+
+    if transaction_batches <= 0:
+        for script in scripts:
+            yield script
+        return
+
+    statements = 0
+    for script in scripts:
+        if statements == 0:
+            yield 'BEGIN TRANSACTION;'
+        yield script
+        statements += 1
+        if statements == transaction_batches:
+            yield 'COMMIT TRANSACTION;'
+            statements = 0
+    if statements > 0:
+        yield 'COMMIT TRANSACTION;'
+
+
+def iterateWorkbookScripts(workbook, worksheets, workers=SCRIPT_WORKERS, batch_rows=BATCH_ROWS, transaction_batches=TRANSACTION_BATCHES, parameterized=False):
+    '''Lazily yields the statements written to a .sql file for each of the
+    passed in worksheets, in order. Statements write up to batch_rows
+    rows, or are sp_executesql calls if parameterized is True, and the
+    statements of each worksheet are grouped into transactions of
+    transaction_batches statements.
+
+    :param1 workbook: dict
+    :param2 worksheets: List[str]
+    :param3 workers: int
+    :param4 batch_rows: int
+    :param5 transaction_batches: int
+    :param6 parameterized: bool
+
+    :return: Iterator[str]
+    '''
+
+    for worksheet in worksheets:
+        # header rows are compiled once into the plan shared by every row of the worksheet
+        statement_plan = StatementPlan(
+            workbook[worksheet], batch_rows, parameterized)
+
+        for script in iterateTransactions(iterateScripts(workbook[worksheet], statement_plan, workers=workers), transaction_batches):
+            yield script
+
+
+def iterateWorkbookFileScripts(filename, validate_worksheet, report, chunk_size=READ_CHUNK_ROWS, sheet_names=None, workers=SCRIPT_WORKERS, batch_rows=BATCH_ROWS, transaction_batches=TRANSACTION_BATCHES, parameterized=False):
+    '''Streams each worksheet of an Excel workbook file chunk_size rows at a
+    time, validating each chunk before rendering its scripts. The first
+    chunk of each worksheet (header rows and data) is checked with the passed
+    in validate_worksheet(worksheet, title) function, later chunks only have
+    their data validated. The scripts of a worksheet are spooled to a
+    temporary file and only yielded once every chunk of the worksheet has
+    passed validation, so a worksheet is written completely or not at all.
+    Validation errors are added to the validation report. If sheet_names is passed only those worksheets are
+    read. With more than 1 worker the chunks are rendered in parallel while
+    the next chunks are read. Statements write up to batch_rows
+    rows, or are sp_executesql calls if parameterized is True, and
+    the statements of each worksheet are grouped into transactions of
+    transaction_batches statements. Chunks are read and rendered in multiples
+    of batch_rows rows so that only the last statement of a worksheet writes
+    fewer rows.
+
+    :param1 filename: str
+    :param2 validate_worksheet: function
+    :param3 report: validation_report.ValidationReport
+    :param4 chunk_size: int
+    :param5 sheet_names: List[str]
+    :param6 workers: int
+    :param7 batch_rows: int
+    :param8 transaction_batches: int
+    :param9 parameterized: bool
+
+    :return: Iterator[str]
+    '''
+
+    if not parameterized and batch_rows > 1:
+        chunk_size = max(chunk_size - chunk_size % batch_rows, batch_rows)
+    for title, chunks in excel_reader.iterateWorkbook(filename, chunk_size, sheet_names):
+        valid_chunks = iterateValidChunks(
+            title, chunks, validate_worksheet, report)
+        first_chunk = next(valid_chunks, None)
+        if first_chunk is None:  # header rows or first chunk failed validation
+            continue
+
+        # header rows are compiled once into the plan shared by every chunk of the worksheet
+        statement_plan = StatementPlan(
+            first_chunk, batch_rows, parameterized)
+        if statement_plan.script_type not in TYPE_OF_SCRIPTS_AVAILABLE:
+            for chunk in valid_chunks:  # the rest of the worksheet is still validated
+                pass
+            continue
+
+        errors = len(report.errors)
+        data_chunks = alignDataChunks((statement_plan.getDataRows(chunk)
+                                       for chunk in itertools.chain([first_chunk], valid_chunks)),
+                                      statement_plan.batch_rows)
+        statements = itertools.chain.from_iterable(
+            renderChunks(statement_plan, data_chunks, workers))
+        with tempfile.TemporaryFile() as spool:
+            for script in iterateTransactions(statements, transaction_batches):
+                pickle.dump(script, spool, pickle.HIGHEST_PROTOCOL)
+            if len(report.errors) > errors:  # a later chunk failed validation
+                continue
+            spool.seek(0)
+            for script in iterateSpooledScripts(spool):
+                yield script
+
+
+def alignDataChunks(data_chunks, batch_rows):
+    '''Lazily regroups chunks of data rows so that every chunk but the last
+    has a multiple of batch_rows rows. Rows left over at the end of a chunk
+    are carried into the next one, so that each batch statement is filled
+    even when the plan had to write fewer rows per statement than the
+    chunks were read with.
+
+    :param1 data_chunks: Iterator[pandas.core.frame.DataFrame]
+    :param2 batch_rows: int
+
+    :return: Iterator[pandas.core.frame.DataFrame]
+    '''
+
+    remainder = None
+    for data in data_chunks:
+        if remainder is not None and len(remainder) > 0:
+            data = pd.concat([remainder, data])
+        end = len(data) - len(data) % batch_rows
+        remainder = data.iloc[end:]
+        if end > 0:
+            yield data.iloc[:end]
+
+    if remainder is not None and len(remainder) > 0:
+        yield remainder
+
+
+def iterateSpooledScripts(spool):
+    '''Lazily reads back the scripts pickled to a spool file, in order.
+
+    :param1 spool: io.BufferedRandom
+
+    :return: Iterator[str]
+    '''
+
+    while True:
+        try:
+            yield pickle.load(spool)
+        except EOFError:
+            return
+
+
+def iterateValidChunks(title, chunks, validate_worksheet, report):
+    '''Lazily validates every chunk of a worksheet and yields each chunk until
+    one fails validation. The chunks after it are still validated so the
+    validation report has every error of the worksheet, but are not yielded.
+    The first chunk (header rows and data) is checked with
+    validate_worksheet(worksheet, title), later chunks only have their data
+    validated.
+
+    :param1 title: str
+    :param2 chunks: Iterator[Tuple[int, excel_reader.Worksheet]]
+    :param3 validate_worksheet: function
+    :param4 report: validation_report.ValidationReport
+
+    :return: Iterator[excel_reader.Worksheet]
+    '''
+
+    valid_worksheet = True
+    for row_offset, chunk in chunks:
+        if row_offset == 0:  # first chunk. validate header rows and data
+            valid_chunk = validate_worksheet(chunk, title)
+        else:
+            valid_chunk = excel_global.validateData(
+                chunk, report, title, row_offset)
+        valid_worksheet = valid_worksheet and valid_chunk
+
+        if valid_worksheet:
+            yield chunk
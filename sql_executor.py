@@ -0,0 +1,191 @@
+'''
+Module of 'excel.py' that runs the scripts of worksheets directly against a
+database instead of writing them to a file. Rows are sent as parameters of the
+worksheet's parameterized statement, a batch of rows at a time, with a commit
+after every few batches. Executors wrap a DB-API connection so the same code
+runs against SQL Server through pyodbc or a local stand-in such as sqlite3.
+Matt Saffert
+2-3-2020
+'''
+
+from excel_constants import *
+import collections
+import datetime
+import decimal
+import time
+import script_generator
+
+
+'''
+The outcome of executing one worksheet. ex. ('Sheet1', 20000, 20, 1.25)
+'''
+ExecutionResult = collections.namedtuple(
+    'ExecutionResult', ['title', 'rows', 'batches', 'seconds'])
+
+'''
+Script types that change data and can be executed
+'''
+EXECUTABLE_SCRIPT_TYPES = ['insert', 'update', 'delete']
+
+
+class StatementExecutor:
+    '''Executes parameterized statements on a DB-API connection that uses ?
+    parameter markers (pyodbc, sqlite3).
+    '''
+
+    def __init__(self, connection):
+        '''Creates an executor with its own cursor on the connection.
+
+        :param1 connection: DB-API connection
+        '''
+
+        self.connection = connection
+        self.cursor = connection.cursor()
+
+    def executeBatch(self, statement, parameter_rows):
+        '''Executes the statement once for each row of parameters.
+
+        :param1 statement: str
+        :param2 parameter_rows: List[tuple]
+        '''
+
+        self.cursor.executemany(statement, parameter_rows)
+
+    def commit(self):
+        '''Commits the current transaction.
+        '''
+
+        self.connection.commit()
+
+    def rollback(self):
+        '''Rolls back the current transaction.
+        '''
+
+        self.connection.rollback()
+
+
+class SqliteExecutor(StatementExecutor):
+    '''Executes parameterized statements on a sqlite3 connection. sqlite3
+    cannot bind Decimal or time values, so they are sent as their text, which
+    SQLite stores by the column's type affinity.
+    '''
+
+    def executeBatch(self, statement, parameter_rows):
+        '''Executes the statement once for each row of parameters.
+
+        :param1 statement: str
+        :param2 parameter_rows: List[tuple]
+        '''
+
+        self.cursor.executemany(statement, [tuple(convertSqliteValue(value) for value in row)
+                                            for row in parameter_rows])
+
+
+def convertSqliteValue(value):
+    '''Converts a parameter value sqlite3 cannot bind to its text.
+    ex. Decimal('3.10') -> '3.10', time(8, 5) -> '08:05:00'
+
+    :param1 value: ?
+
+    :return: ?
+    '''
+
+    if isinstance(value, (decimal.Decimal, datetime.time)):
+        return str(value)
+
+    return value
+
+
+class PyodbcExecutor(StatementExecutor):
+    '''Executes parameterized statements on a SQL Server pyodbc connection,
+    sending each batch of rows to the server in a single round trip.
+    '''
+
+    def __init__(self, connection):
+        '''Creates an executor with its own cursor on the connection.
+
+        :param1 connection: pyodbc.Connection
+        '''
+
+        StatementExecutor.__init__(self, connection)
+        self.cursor.fast_executemany = True
+
+
+def executeWorksheet(executor, worksheet, title, report, batch_rows=EXECUTE_BATCH_ROWS, transaction_batches=EXECUTE_TRANSACTION_BATCHES):
+    '''Executes the statement of every data row of the worksheet, batch_rows
+    rows at a time, committing after every transaction_batches batches. With 0
+    transaction_batches the worksheet is committed once at the end. If a
+    batch fails the uncommitted batches are rolled back and the error is
+    raised. Select worksheets are not executed, and neither are worksheets
+    with a value that cannot be sent as its parameter's type, which is added
+    to the validation report.
+
+    :param1 executor: StatementExecutor
+    :param2 worksheet: excel_reader.Worksheet
+    :param3 title: str
+    :param4 report: validation_report.ValidationReport
+    :param5 batch_rows: int
+    :param6 transaction_batches: int
+
+    :return: ExecutionResult
+    '''
+
+    start = time.perf_counter()
+    statement_plan = script_generator.StatementPlan(worksheet)
+    if statement_plan.script_type not in EXECUTABLE_SCRIPT_TYPES:
+        return ExecutionResult(title, 0, 0, time.perf_counter() - start)
+
+    data = statement_plan.getDataRows(worksheet)
+    # every value is checked before the first batch so none are committed
+    if not statement_plan.validateParameterValues(data, report, title):
+        return ExecutionResult(title, 0, 0, time.perf_counter() - start)
+
+    batches = 0
+    try:
+        for chunk in script_generator.splitDataRows(data, batch_rows):
+            executor.executeBatch(statement_plan.parameterized_statement,
+                                  statement_plan.getParameterRows(chunk))
+            batches += 1
+            if transaction_batches > 0 and batches % transaction_batches == 0:
+                executor.commit()
+        executor.commit()
+    except Exception:
+        executor.rollback()
+        raise
+
+    return ExecutionResult(title, len(data), batches, time.perf_counter() - start)
+
+
+def executeWorkbook(executor, workbook, worksheets, report, batch_rows=EXECUTE_BATCH_ROWS, transaction_batches=EXECUTE_TRANSACTION_BATCHES):
+    '''Executes each of the passed in worksheets, in order.
+
+    :param1 executor: StatementExecutor
+    :param2 workbook: dict
+    :param3 worksheets: List[str]
+    :param4 report: validation_report.ValidationReport
+    :param5 batch_rows: int
+    :param6 transaction_batches: int
+
+    :return: List[ExecutionResult]
+    '''
+
+    return [executeWorksheet(executor, workbook[worksheet], worksheet, report, batch_rows, transaction_batches)
+            for worksheet in worksheets]
+
+
+def formatExecutionResults(results):
+    '''Formats the rows executed for each worksheet and how fast they were sent
+    with one line per worksheet. ex. "Sheet1: 20000 rows in 1.25 seconds (16000 rows/sec)"
+
+    :param1 results: List[ExecutionResult]
+
+    :return: str
+    '''
+
+    lines = []
+    for result in results:
+        rows_per_second = result.rows / result.seconds if result.seconds > 0 else 0
+        lines.append(result.title + ': ' + str(result.rows) + ' rows in ' + '{:.2f}'.format(result.seconds) +
+                     ' seconds (' + '{:.0f}'.format(rows_per_second) + ' rows/sec)')
+
+    return '\n'.join(lines)
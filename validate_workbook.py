@@ -7,6 +7,9 @@ Matt Saffert
 
 import excel_global
 import global_gui as gui
+import parallel_worksheets
+import schema_catalog
+from validation_report import ValidationReport
 from excel_constants import *
 
 
@@ -24,17 +27,31 @@ def validationMode():
     validate_with_sql, additional_box_val = gui.createTwoChoiceBox(  # tkinter dialog box that asks user if they want to connect to a SQL database to validate spreadsheet
         'Would you like to validate Workbook with SQL table or generic validation?', 'Generic', 'SQL')
 
+    if validate_with_sql == 'SQL':  # the design of every table in the workbook is loaded with one query
+        excel_global.prefetchSchemaCatalog(
+            schema_catalog.getWorkbookTableNames(workbook))
+
+    report = ValidationReport()
     any_valid_sheets, all_valid_sheets = validWorkbook(
-        workbook, validate_with_sql)
+        workbook, validate_with_sql, report)
 
     displayWorkbookValidationResult(any_valid_sheets, all_valid_sheets)
 
+    if report.hasErrors():  # every validation error is shown at once
+        gui.createReportBox(report)
+
 
-def validWorkbook(workbook, validate_with_sql):
-    '''Cycles through worksheets in a workbook checking if they're valid.
+def validWorkbook(workbook, validate_with_sql, report, workers=WORKSHEET_WORKERS):
+    '''Cycles through worksheets in a workbook checking if they're valid. Errors
+    are added to the validation report. With more than 1 worker the worksheets
+    are validated in parallel once the user has chosen which ones to validate.
 
     :param1 workbook: dict
     :param2 validate_with_sql: str
+    :param3 report: validation_report.ValidationReport
+    :param4 workers: int
+
+    :return: bool, bool
     '''
 
     any_valid_sheets = False  # False if all spreadsheets fail validation
@@ -42,10 +59,33 @@ def validWorkbook(workbook, validate_with_sql):
     additional_box_val = 0
     write_script_for = "Yes"
 
+    if workers > 1:
+        worksheets, additional_box_val = excel_global.chooseWorksheets(
+            list(workbook))
+        sql_database = None
+        if validate_with_sql == 'SQL':
+            sql_database = SQL_SERVER_NAME, excel_global.connectToSQLServer()[2]
+        results = parallel_worksheets.processWorkbook(
+            workbook, worksheets, validate_with_sql, report, workers, sql_database, create_scripts=False)
+        print(parallel_worksheets.formatWorksheetTimings(results))
+
+        # worksheets the user chose not to validate count as failing validation
+        all_valid_sheets = len(results) == len(workbook)
+        for result in results:
+            all_valid_sheets = result.valid and all_valid_sheets
+            any_valid_sheets = result.valid or any_valid_sheets
+            if result.valid and not additional_box_val:
+                output_string = result.title + \
+                    " is VALID. This worksheet will function properly with the 'Write SQL script' mode of this program."
+                gui.createPopUpBox(
+                    output_string)  # tkinter dialog box
+
+        return any_valid_sheets, all_valid_sheets
+
     for worksheet in workbook:
         # check if worksheet is is valid and if user wants to write scripts for them
         valid_worksheet, additional_box_val, write_script_for = excel_global.validWorksheet(
-            workbook[worksheet], validate_with_sql, worksheet, additional_box_val, write_script_for)
+            workbook[worksheet], validate_with_sql, worksheet, additional_box_val, write_script_for, report)
         # True if spreadsheet passes validation
         all_valid_sheets = valid_worksheet and all_valid_sheets
         if valid_worksheet:  # only write to Excel if the Excel spreadsheet is a valid format
@@ -0,0 +1,117 @@
+'''
+Module of 'excel.py' that collects the errors found while validating Excel
+workbooks so they can be reported all at once.
+Matt Saffert
+1-20-2020
+'''
+
+import collections
+import csv
+import excel_address
+import json
+import sys
+
+
+'''
+A single validation error. ex. ('MISSING_VALUE', 'Sheet1', 'C7', 'You have not entered...')
+'''
+ValidationError = collections.namedtuple(
+    'ValidationError', ['code', 'sheet', 'cell', 'message'])
+
+
+class ValidationReport:
+    '''Errors found while validating the worksheets of a workbook, in the order
+    they were found.
+    '''
+
+    def __init__(self):
+        '''Creates an empty validation report.
+        '''
+
+        self.errors = []
+
+    def addError(self, code, sheet, cell, message):
+        '''Adds an error to the report. The cell's A1 address is checked and
+        written the same way for every error. ex. '$c$7' -> 'C7'
+
+        :param1 code: str
+        :param2 sheet: str
+        :param3 cell: str
+        :param4 message: str
+        '''
+
+        cell = excel_address.getCellAddress(
+            *excel_address.parseCellAddress(cell))
+        self.errors.append(ValidationError(code, sheet, cell, message))
+
+    def addErrors(self, errors):
+        '''Adds errors found by another report, for example in a worker process,
+        to the report.
+
+        :param1 errors: List[ValidationError]
+        '''
+
+        self.errors.extend(errors)
+
+    def hasErrors(self):
+        '''Checks whether any errors have been added to the report.
+
+        :return: bool
+        '''
+
+        return len(self.errors) > 0
+
+    def formatSummary(self):
+        '''Formats the report as text with one line per error.
+
+        :return: str
+        '''
+
+        sheets = set([error.sheet for error in self.errors])
+        lines = [str(len(self.errors)) + ' error(s) found in ' +
+                 str(len(sheets)) + ' worksheet(s).']
+        for error in self.errors:
+            lines.append(error.sheet + '!' + error.cell + ' [' +
+                         error.code + ']: ' + error.message)
+
+        return '\n'.join(lines)
+
+    def printReport(self, file=sys.stdout):
+        '''Prints the report as text.
+
+        :param1 file: io.TextIOBase
+        '''
+
+        print(self.formatSummary(), file=file)
+
+    def writeCSV(self, filename):
+        '''Writes the report to a CSV file with one row per error.
+
+        :param1 filename: str
+        '''
+
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(ValidationError._fields)
+            writer.writerows(self.errors)
+
+    def writeJSON(self, filename):
+        '''Writes the report to a JSON file as a list of errors.
+
+        :param1 filename: str
+        '''
+
+        with open(filename, 'w') as f:
+            json.dump([error._asdict() for error in self.errors], f, indent=4)
+
+    def saveReport(self, filename):
+        '''Writes the report to a JSON file if the filename ends with ".json",
+        otherwise to a CSV file.
+
+        :param1 filename: str
+        '''
+
+        if filename.lower().endswith('.json'):
+            self.writeJSON(filename)
+        else:
+            self.writeCSV(filename)
@@ -6,14 +6,19 @@ Matt Saffert
 '''
 
 from excel_constants import *
-import re
+from script_generator import *
+import itertools
+import tempfile
 import tkinter
+import bulk_export
 import excel_global
+import excel_reader
+import parallel_worksheets
+import sql_executor
+from validation_report import ValidationReport
 from tkinter import filedialog as tkFileDialog
-import pandas as pd
 import global_gui as gui
 
-
 def writeMode():
     '''Starts the writing script mode of the application.
 
@@ -24,21 +29,32 @@ def writeMode():
     gui.createPopUpBox(TEMPLATE_DESCRIPTION, "600x500")  # tkinter dialog box
 
     output_string = "Choose the Excel workbook you'd like to make scripts for."
-    workbook = gui.openExcelFile(output_string)
+    filename = gui.getExcelFileName(output_string)
 
     validate_with_sql, additional_box_val = gui.createTwoChoiceBox(
         'Would you like to validate Workbook with SQL table or generic validation?', 'Generic', 'SQL')
 
-    write_to_sql = 'SQL'
-    write_to_excel = 'Excel'
-    description = 'Would you like to write the sql scripts to a ".sql" file or to an Excel spreadsheet?'
-    write_to, additional_box_val = gui.createTwoChoiceBox(  # write scripts to new SQL or Excel file
-        description, write_to_sql, write_to_excel)
+    write_to = gui.getWriteTarget()  # write scripts to new SQL or Excel file, bulk load files, or execute them
+
+    if validate_with_sql == 'SQL':  # the design of every table in the workbook is loaded with one query
+        excel_global.prefetchSchemaCatalog(
+            excel_reader.getTableNames(filename))
 
-    if write_to == 'SQL':
-        save_file = writeToSQL(workbook, validate_with_sql)
+    report = ValidationReport()
+    if write_to == 'SQL':  # workbook is streamed so scripts are written while it is read
+        save_file = writeToSQLStream(filename, validate_with_sql, report)
     elif write_to == 'Excel':
-        save_file = writeToExcel(workbook, validate_with_sql)
+        workbook = excel_reader.readWorkbook(filename)
+        save_file = writeToExcel(workbook, validate_with_sql, report)
+    elif write_to == 'Execute':
+        workbook = excel_reader.readWorkbook(filename)
+        save_file = writeToDatabase(workbook, validate_with_sql, report)
+    elif write_to == 'Bulk':
+        workbook = excel_reader.readWorkbook(filename)
+        save_file = writeToBulkFiles(workbook, validate_with_sql, report)
+
+    if report.hasErrors():  # every validation error is shown at once
+        gui.createReportBox(report)
 
     if save_file == '':  # no scripts were written because there were no valid worksheets
         output_string = "No files were changed. Closing program."
@@ -46,444 +62,314 @@ def writeMode():
             output_string)  # tkinter dialog box
 
 
-def isValueTypeString(type):
-    '''Checks the SQL type of the column of data in the spreadsheet based on the type
-    row in the excel spreadsheet. Returns true id type needs parenthesis around it
-    in the script
+def createWorksheetValidator(validate_with_sql, report):
+    '''Creates the function used to validate the first chunk of each worksheet
+    when a workbook is streamed. The user is asked whether to validate/create
+    scripts for each worksheet unless they choose to do this for all of them.
 
-    :param1 type: str
+    :param1 validate_with_sql: str
+    :param2 report: validation_report.ValidationReport
 
-    :return: bool
+    :return: function
     '''
 
-    # ex. 'varchar(200)' -> 'varchar'
-    # regular expression that strips parenthesis off end of type
-    type = re.sub("[\(\[].*?[\)\]]", "", str(type))
-
-    # decides whether the value of this type needs parenthesis around it in script
-    if (type in SQL_STRING_TYPE) or (type in SQL_DATETIME_TYPE) or (type in SQL_OTHER_TYPE):
-        return True
-    elif type == 'bit':  # bit can be represented by both 1/0 integers, or 'True'/'False' strings. This program uses strings
-        return True
-    else:
-        return False
-
-
-def shouldInclude(value):
-    '''Checks whether a column of data should be included in the SQL script based on
-    the include row of the excel spreadsheet.
+    popup_state = {'skip_popup': 0, 'write_script_for': "Yes"}
 
-    :param1 value: str
+    def validateWorksheet(worksheet, title):
+        valid_worksheet, popup_state['skip_popup'], popup_state['write_script_for'] = excel_global.validWorksheet(
+            worksheet, validate_with_sql, title, popup_state['skip_popup'], popup_state['write_script_for'], report)
+        return valid_worksheet
 
-    :return: bool
-    '''
+    return validateWorksheet
 
-    include = str(value)
-    if include == 'include':
-        return True
-    return False
 
+def getSQLDatabase(validate_with_sql):
+    '''Gets the database used to validate worksheets with SQL in worker
+    processes, which cannot show windows themselves. The user is only asked
+    if they have not already chosen a database.
 
-def includeInWhereClause(value):
-    '''Checks whether a column of data should be included in the where clause of the
-    generated SQL script based on the where row of the excel spreadsheet.
+    :param1 validate_with_sql: str
 
-    :param1 value: str
-
-    :return: bool
+    :return: Tuple[str, str]
     '''
 
-    wheres = str(value)
-    if wheres == 'where':
-        return True
-    return False
-
-
-def writeScripts(worksheet):
-    '''Checks the desired type of SQL script to be generated and calls the corresponding
-    function the generate scripts.
-
-    :param1 worksheet: pandas.core.frame.DataFrame
-
-    :return: dict
-    '''
-
-    scripts = {}
-    script_type = worksheet.loc['info'][SCRIPT_TYPE]
-
-    if script_type == 'insert':
-        scripts = createInsertScripts(worksheet)
-    elif script_type == 'update':
-        scripts = createUpdateScripts(worksheet)
-    elif script_type == 'delete':
-        scripts = createDeleteScripts(worksheet)
-    elif script_type == 'select':
-        scripts = createSelectScripts(worksheet)
-
-    return scripts
-
-
-def createColumnClause(worksheet, statement):
-    '''Helper function to createInsertScripts() that creates the list of column
-    names to insert/select for the SQL script for each row of the excel spreadsheet
-
-    :param1 worksheet: pandas.core.frame.DataFrame
-    :param2 statement: str
-
-    :return: str
-    '''
-
-    # concatenates each included value of each column to the return string
-    for i in range(len(worksheet.loc['names']) - 1):
-        if shouldInclude(worksheet.loc['include'][i]):
-            statement = ''.join(
-                [statement, (str(worksheet.loc['names'][i]) + ', ')])
-    # checks last column
-    if shouldInclude(worksheet.loc['include'][len(worksheet.loc['names']) - 1]):
-        statement = ''.join(
-            [statement, (str(worksheet.loc['names'][len(worksheet.loc['names']) - 1]))])
-    else:
-        # if last column should not be included drop last space and comma from string
-        statement = statement[:-2]
-
-    return statement
-
-
-def createValuesClause(worksheet, statement, row):
-    '''Helper function to createInsertScripts() that creates the VALUES clause of
-    the SQL script for each row of the excel spreadsheet
-
-    :param1 worksheet: pandas.core.frame.DataFrame
-    :param2 statement: str
-    :param3 row: int
-
-    :return: str
-    '''
-
-    # concatenates each included value of each column to the return string
-    for cell in range(len(worksheet.iloc[row]) - 1):
-        if shouldInclude(worksheet.loc['include'][cell]):
-            string = isValueTypeString(worksheet.loc['types'][cell])
-            if string:  # add quotes
-                statement = ''.join(
-                    [statement, ("'" + str(worksheet.iloc[row][cell]) + "', ")])
-            else:
-                statement = ''.join(
-                    [statement, (str(worksheet.iloc[row][cell]) + ", ")])
-    # checks last column
-    if shouldInclude(worksheet.loc['include'][len(worksheet.iloc[row]) - 1]):
-        string = isValueTypeString(
-            worksheet.loc['types'][len(worksheet.iloc[row]) - 1])
-        if string:  # add quotes
-            statement = ''.join(
-                [statement, ("'" + str(worksheet.iloc[row][len(worksheet.iloc[row]) - 1]) + "');")])
-        else:
-            statement = ''.join(
-                [statement, (str(worksheet.iloc[row][len(worksheet.iloc[row]) - 1]) + ");")])
-    else:
-        # if last column should not be included drop last space and comma from string
-        statement = statement[:-2] + ');'
+    if validate_with_sql == 'SQL':
+        return SQL_SERVER_NAME, excel_global.connectToSQLServer()[2]
 
-    return statement
+    return None
 
 
-def createInsertScripts(worksheet):
-    '''Creates the insert scripts based on the data provided in the Excel spreadsheet.
+def writeToExcel(workbook, validate_with_sql, report, workers=WORKSHEET_WORKERS):
+    '''Iterates through each worksheet in the imported workbook, creates
+    scripts for each worksheet, and writes the scripts to a new workbook. Returns
+    True if scripts were generated and need to be saved, otherwise False.
+    Validation errors are added to the validation report. With more than 1
+    worker the worksheets are processed in parallel once the user has chosen
+    which ones to create scripts for.
 
-    :param1 table_name: pandas.core.frame.DataFrame
-    :param2 worksheet: tuple
+    :param1 workbook: dict
+    :param2 validate_with_sql: str
+    :param3 report: validation_report.ValidationReport
+    :param4 workers: int
 
-    :return: dict
+    :return: bool
     '''
 
-    script_dict = {}  # {cell: script}. ex. {'G7': 'INSERT INTO... ;'}
-    pre_statement = 'INSERT INTO ' + \
-        worksheet.loc['info'][TABLE_NAME] + ' ('
-
-    insert_statement = createColumnClause(
-        worksheet, pre_statement) + ') VALUES ('
-
-    # creates script for each row of data in the Excel table
-    for row in range(START_OF_DATA_ROWS_INDEX, len(worksheet) - 1):
-        values_statement = createValuesClause(
-            worksheet, insert_statement, row)
-
-        excel_cell = excel_global.getExcelCellToInsertInto(
-            len(worksheet.iloc[row]), row)
-        script_dict[excel_cell] = values_statement
-
-    all_none = True
-    # look at the last row. Row may be blank and generate. None values. so don't write scripts
-    for i in range(len(worksheet.iloc[len(worksheet) - 1])):
-        # if there is one value that isn't None, write scripts
-        if worksheet.iloc[len(worksheet) - 1][i] != None:
-            all_none = False
-    if not all_none:
-        values_statement = createValuesClause(
-            worksheet, insert_statement, len(worksheet) - 1)
-        excel_cell = excel_global.getExcelCellToInsertInto(
-            len(worksheet.iloc[len(worksheet) - 1]), len(worksheet) - 1)
-        script_dict[excel_cell] = values_statement
-
-    return script_dict
-
-
-def createUpdateClause(worksheet, statement, row):
-    '''Helper function to createUpdateScripts() that creates the UPDATE clause of the
-    SQL script for each row of the excel spreadsheet
+    any_valid_sheets = False  # False if all spreadsheets fail validation
+    any_changes = ''
+    additional_box_val = 0
+    write_script_for = "Yes"
 
-    :param1 worksheet: pandas.core.frame.DataFrame
-    :param5 statement: str
-    :param6 row: int
+    if workers > 1:
+        worksheets, additional_box_val = excel_global.chooseWorksheets(
+            list(workbook))
+        results = parallel_worksheets.processWorkbook(
+            workbook, worksheets, validate_with_sql, report, workers, getSQLDatabase(validate_with_sql))
+        print(parallel_worksheets.formatWorksheetTimings(results))
 
-    :return: str
-    '''
+        for result in results:
+            if result.valid:
+                setScriptsColumn(workbook[result.title], result.scripts)
+                any_changes = 'Excel'
+                any_valid_sheets = True
+        if any_valid_sheets:
+            gui.saveToExcel(workbook)
 
-    # concatenates each included value of each column to the return string
-    for cell in range(len(worksheet.iloc[row]) - 1):
-        if shouldInclude(worksheet.loc['include'][cell]):
-            statement = ''.join(
-                [statement, (str(worksheet.loc['names'][cell]) + ' = ')])
-            string = isValueTypeString(worksheet.loc['types'][cell])
-            if string:  # add quotes
-                statement = ''.join(
-                    [statement, ("'" + str(worksheet.iloc[row][cell]) + "', ")])
-            else:
-                statement = ''.join(
-                    [statement, (str(worksheet.iloc[row][cell]) + ", ")])
-    # checks last column
-    if shouldInclude(worksheet.loc['include'][len(worksheet.iloc[row]) - 1]):
-        statement = ''.join(
-            [statement, (str(worksheet.loc['names'][len(worksheet.loc['names']) - 1]) + ' = ')])
-        string = isValueTypeString(
-            worksheet.loc['types'][len(worksheet.loc['names']) - 1])
-        if string:  # add quotes
-            statement = ''.join(
-                [statement, ("'" + str(worksheet.iloc[row][len(worksheet.iloc[row]) - 1]) + "' WHERE ")])
-        else:
-            statement = ''.join(
-                [statement, (str(worksheet.iloc[row][len(worksheet.iloc[row]) - 1]) + " WHERE ")])
-    else:
-        # if last column should not be included drop last space and comma from string
-        statement = statement[:-2] + ' WHERE '
+        return any_changes
 
-    return statement
+    for worksheet in workbook:
+        valid_worksheet, additional_box_val, write_script_for = excel_global.validWorksheet(
+            workbook[worksheet], validate_with_sql, worksheet, additional_box_val, write_script_for, report)
 
+        if valid_worksheet:  # only write to Excel if the Excel spreadsheet is a valid format
 
-def createWhereClause(worksheet, statement, row):
-    '''Helper function to createUpdateScripts() that creates the WHERE clause of the
-    SQL script for each row of the excel spreadsheet
+            # header rows are compiled once into the plan shared by every row of the worksheet
+            statement_plan = StatementPlan(workbook[worksheet])
 
-    :param1 worksheet: pandas.core.frame.DataFrame
-    :param5 statement: str
-    :param6 row: int
+            # writes scripts to a new column of the worksheet
+            addScriptsColumn(workbook[worksheet], statement_plan)
 
-    :return: str
-    '''
+            any_changes = 'Excel'  # changes were made and need to be saved
 
-    # concatenates each where value of each column to the return string
-    for i in range(len(worksheet.iloc[row]) - 1):
-        if includeInWhereClause(worksheet.loc['where'][i]):
-            statement = ''.join(
-                [statement, (str(worksheet.loc['names'][i]) + ' = ')])
-            string = isValueTypeString(worksheet.loc['types'][i])
-            if string:  # add quotes
-                statement = ''.join(
-                    [statement, ("'" + str(worksheet.iloc[row][i]) + "'  AND  ")])
-            else:
-                statement = ''.join(
-                    [statement, (str(worksheet.iloc[row][i]) + "  AND  ")])
-    # checks last column
-    if includeInWhereClause(worksheet.loc['where'][len(worksheet.loc['names']) - 1]):
-        statement = ''.join(
-            [statement, (str(worksheet.loc['names'][len(worksheet.loc['names']) - 1]) + ' = ')])
-        string = isValueTypeString(
-            worksheet.loc['types'][len(worksheet.loc['names']) - 1])
-        if string:  # add quotes
-            statement = ''.join(
-                [statement, ("'" + str(worksheet.iloc[row][len(worksheet.iloc[row]) - 1]) + "';")])
-        else:
-            statement = ''.join(
-                [statement, (str(worksheet.iloc[row][len(worksheet.iloc[row]) - 1]) + ";")])
-    else:
-        # if last column is not in where clause drop 'AND' statement or drop ' WHERE' statement
-        statement = statement[:-7] + ';'
+            any_valid_sheets = True  # changes were made and need to be saved
+    #
+    if any_valid_sheets:
+        gui.saveToExcel(workbook)
 
-    return statement
+    return any_changes
 
 
-def createUpdateScripts(worksheet):
-    '''Creates the update scripts based on the data provided in the Excel spreadsheet.
+def saveToSQL(scripts, buffer_size=SQL_WRITE_BUFFER_SIZE):
+    '''Saves the scripts to a SQL file. Scripts are written as they are generated
+    through a buffer that is flushed to the file every buffer_size characters.
+    The user is only asked for a file once the first script has been generated.
+    Returns True if any scripts were saved, otherwise False
 
-    :param1 worksheet: pandas.core.frame.DataFrame
+    :param1 scripts: Iterable[str]
+    :param2 buffer_size: int
 
-    :return: dict
+    :return: bool
     '''
 
-    script_dict = {}  # {cell: script}. ex. {'G7': 'UPDATE... ;'}
-    pre_statement = 'UPDATE ' + \
-        worksheet.loc['info'][TABLE_NAME] + ' SET '
-
-    # creates script for each row of data in the Excel table
-    for row in range(START_OF_DATA_ROWS_INDEX, len(worksheet)):
-        update_statement = createUpdateClause(
-            worksheet, pre_statement, row)
+    scripts = iter(scripts)
+    first_script = next(scripts, None)
+    if first_script is None:  # no scripts to save
+        return False
 
-        where_statement = createWhereClause(
-            worksheet, update_statement, row)
+    file = tkinter.Tk()
+    # opens file explorer so user can choose file to write to
+    file.filename = tkFileDialog.asksaveasfilename(
+        initialdir="C:/", title="Select/create file to save/write to", defaultextension=".sql")
+    file.destroy()
+    with open(file.filename, 'w') as f:
+        writeBufferedScripts(f, itertools.chain(
+            [first_script], scripts), buffer_size)
 
-        excel_cell = excel_global.getExcelCellToInsertInto(
-            len(worksheet.iloc[row]), row)
-        script_dict[excel_cell] = where_statement
+    output_string = "Scripts saved to: '" + \
+        str(file.filename) + "'"
+    gui.createPopUpBox(
+        output_string)  # tkinter dialog box
 
-    return script_dict
+    return True
 
 
-def createDeleteScripts(worksheet):
-    '''Creates the delete scripts based on the data provided in the Excel spreadsheet.
+def writeToSQL(workbook, validate_with_sql, report, buffer_size=SQL_WRITE_BUFFER_SIZE, workers=WORKSHEET_WORKERS):
+    '''Iterates through each worksheet in the imported workbook, creates
+    scripts for each worksheet, and writes the scripts to a SQL file. Returns
+    True if scripts were generated and have been saved, otherwise False.
+    Validation errors are added to the validation report. With more than 1
+    worker the worksheets are processed in parallel once the user has chosen
+    which ones to create scripts for.
 
-    :param1 worksheet: pandas.core.frame.DataFrame
+    :param1 workbook: dict
+    :param2 validate_with_sql: str
+    :param3 report: validation_report.ValidationReport
+    :param4 buffer_size: int
+    :param5 workers: int
 
-    :return: dict
+    :return: bool
     '''
 
-    script_dict = {}  # {cell: script}. ex. {'G7': 'DELETE... ;'}
-    pre_statement = 'DELETE FROM ' + \
-        worksheet.loc['info'][TABLE_NAME] + ' WHERE '
-
-    # creates script for each row of data in the Excel table
-    for row in range(START_OF_DATA_ROWS_INDEX, len(worksheet)):
-        where_statement = createWhereClause(
-            worksheet, pre_statement, row)
-
-        excel_cell = excel_global.getExcelCellToInsertInto(
-            len(worksheet.iloc[row]), row)
-        script_dict[excel_cell] = where_statement
-
-    return script_dict
-
-
-def createSelectScripts(worksheet):
-    '''Creates the select scripts based on the data provided in the Excel spreadsheet.
-
-    :param1 worksheet: pandas.core.frame.DataFrame
+    any_changes = ''
+    valid_worksheets = []
+    additional_box_val = 0
+    write_script_for = "Yes"
 
-    :return: dict
-    '''
+    if workers > 1:
+        worksheets, additional_box_val = excel_global.chooseWorksheets(
+            list(workbook))
+        results = parallel_worksheets.processWorkbook(
+            workbook, worksheets, validate_with_sql, report, workers, getSQLDatabase(validate_with_sql), sql_file=True)
+        print(parallel_worksheets.formatWorksheetTimings(results))
 
-    script_dict = {}  # {cell: script}. ex. {'G7': 'INSERT INTO... ;'}
-    pre_statement = 'SELECT ('
+        # scripts are written in the order of the worksheets
+        if saveToSQL(itertools.chain.from_iterable(result.scripts for result in results if result.valid), buffer_size):
+            any_changes = 'SQL'
 
-    select_statement = createColumnClause(
-        worksheet, pre_statement) + ') FROM ' + worksheet.loc['info'][TABLE_NAME] + ' WHERE '
+        return any_changes
 
-    # creates script for each row of data in the Excel table
-    for row in range(START_OF_DATA_ROWS_INDEX, len(worksheet)):
-        where_statement = createWhereClause(
-            worksheet, select_statement, row)
+    for worksheet in workbook:
+        valid_worksheet, additional_box_val, write_script_for = excel_global.validWorksheet(
+            workbook[worksheet], validate_with_sql, worksheet, additional_box_val, write_script_for, report)
 
-        excel_cell = excel_global.getExcelCellToInsertInto(
-            len(worksheet.iloc[row]), row)
-        script_dict[excel_cell] = where_statement
+        if valid_worksheet:  # only write to SQL if the Excel spreadsheet is a valid format
+            valid_worksheets.append(worksheet)
+    # scripts are generated while they are being written to the file
+    if saveToSQL(iterateWorkbookScripts(workbook, valid_worksheets), buffer_size):
+        any_changes = 'SQL'
 
-    return script_dict
+    return any_changes
 
 
-def writeToExcel(workbook, validate_with_sql):
-    '''Iterates through each worksheet in the imported workbook, creates
-    scripts for each worksheet, and writes the scripts to a new workbook. Returns
-    True if scripts were generated and need to be saved, otherwise False
+def writeToDatabase(workbook, validate_with_sql, report, batch_rows=EXECUTE_BATCH_ROWS, transaction_batches=EXECUTE_TRANSACTION_BATCHES):
+    '''Iterates through each worksheet in the imported workbook and executes
+    the scripts of each valid worksheet against a database chosen by the user,
+    batch_rows rows at a time with a commit every transaction_batches batches.
+    Returns 'Execute' if any rows were executed, otherwise ''. Validation
+    errors are added to the validation report.
 
     :param1 workbook: dict
     :param2 validate_with_sql: str
+    :param3 report: validation_report.ValidationReport
+    :param4 batch_rows: int
+    :param5 transaction_batches: int
 
-    :return: bool
+    :return: str
     '''
 
-    any_valid_sheets = False  # False if all spreadsheets fail validation
     any_changes = ''
+    valid_worksheets = []
     additional_box_val = 0
     write_script_for = "Yes"
 
     for worksheet in workbook:
         valid_worksheet, additional_box_val, write_script_for = excel_global.validWorksheet(
-            workbook[worksheet], validate_with_sql, worksheet, additional_box_val, write_script_for)
+            workbook[worksheet], validate_with_sql, worksheet, additional_box_val, write_script_for, report)
 
-        if valid_worksheet:  # only write to Excel if the Excel spreadsheet is a valid format
+        if valid_worksheet:  # only execute if the Excel spreadsheet is a valid format
+            valid_worksheets.append(worksheet)
+    if len(valid_worksheets) == 0:
+        return any_changes
 
-            # returns dict containing excel cell coordinates as key and script to writeas value
-            scripts = writeScripts(workbook[worksheet])
-
-            any_changes = 'Excel'  # changes were made and need to be saved
-            # writes script to worksheet
-            df_scripts = ['', 'Scripts', '', '', '']
-            for cell, script in scripts.items():
-                df_scripts.append(script)
-            workbook[worksheet]['scripts'] = df_scripts
+    tables, cursor, sql_database_name = excel_global.connectToSQLServer()
+    results = sql_executor.executeWorkbook(sql_executor.PyodbcExecutor(
+        cursor.connection), workbook, valid_worksheets, report, batch_rows, transaction_batches)
 
-            any_valid_sheets = True  # changes were made and need to be saved
-    #
-    if any_valid_sheets:
-        gui.saveToExcel(workbook)
+    if sum([result.rows for result in results]) > 0:
+        any_changes = 'Execute'
+    output_string = "Scripts executed on " + sql_database_name + ":\n" + \
+        sql_executor.formatExecutionResults(results)
+    gui.createPopUpBox(output_string, "600x300")  # tkinter dialog box
 
     return any_changes
 
 
-def saveToSQL(text_file):
-    '''Saves the string to a SQL file.
-
-    :param1 text_file: str
-    '''
-
-    file = tkinter.Tk()
-    # opens file explorer so user can choose file to write to
-    file.filename = tkFileDialog.asksaveasfilename(
-        initialdir="C:/", title="Select/create file to save/write to", defaultextension=".sql")
-    f = open(file.filename, 'w')
-    f.write(text_file)
-    f.close()
-    file.destroy()
-
-    output_string = "Scripts saved to: '" + \
-        str(file.filename) + "'"
-    gui.createPopUpBox(
-        output_string)  # tkinter dialog box
-
-
-def writeToSQL(workbook, validate_with_sql):
-    '''Iterates through each worksheet in the imported workbook, creates
-    scripts for each worksheet, and writes the scripts to a SQL file. Returns
-    True if scripts were generated and have been saved, otherwise False
+def writeToBulkFiles(workbook, validate_with_sql, report):
+    '''Iterates through each worksheet in the imported workbook and writes the
+    bulk load files of each valid insert worksheet, with a "bulk_insert.sql"
+    file that loads them, to a directory chosen by the user. Returns 'Bulk' if
+    any files were written, otherwise ''. Validation errors are added to the
+    validation report.
 
     :param1 workbook: dict
     :param2 validate_with_sql: str
+    :param3 report: validation_report.ValidationReport
 
-    :return: bool
+    :return: str
     '''
 
-    any_valid_sheets = False  # False if all spreadsheets fail validation
     any_changes = ''
-    text_file = ''
+    valid_worksheets = []
     additional_box_val = 0
     write_script_for = "Yes"
 
     for worksheet in workbook:
         valid_worksheet, additional_box_val, write_script_for = excel_global.validWorksheet(
-            workbook[worksheet], validate_with_sql, worksheet, additional_box_val, write_script_for)
+            workbook[worksheet], validate_with_sql, worksheet, additional_box_val, write_script_for, report)
 
-        if valid_worksheet:  # only write to Excel if the Excel spreadsheet is a valid format
+        if valid_worksheet:  # only write files if the Excel spreadsheet is a valid format
+            valid_worksheets.append(worksheet)
+    if len(valid_worksheets) == 0:
+        return any_changes
 
-            # returns dict containing excel cell coordinates as key and script to write as value
-            scripts = writeScripts(workbook[worksheet])
+    file = tkinter.Tk()
+    # opens file explorer so user can choose the directory to write the files to
+    file.directory = tkFileDialog.askdirectory(
+        initialdir="C:/", title="Select directory to save bulk load files to")
+    file.destroy()
+    try:
+        results = bulk_export.writeWorkbookBulkFiles(
+            workbook, valid_worksheets, file.directory, report)
+    except ValueError as e:  # a value cannot be written to a data file
+        gui.createPopUpBox(str(e))
+        return any_changes
+
+    if len(results) == 0:
+        output_string = "No insert worksheets to write bulk load files for."
+    else:
+        any_changes = 'Bulk'
+        output_string = "Bulk load files saved to: '" + file.directory + "'\n" + \
+            bulk_export.formatBulkFiles(results)
+    gui.createPopUpBox(output_string, "600x300")  # tkinter dialog box
 
-            any_changes = 'SQL'
+    return any_changes
 
-            for cell, script in scripts.items():
-                text_file += script + '\n'
 
-            any_valid_sheets = True  # changes were made and need to be saved
-    #
-    if any_valid_sheets:
-        saveToSQL(text_file)
+def writeToSQLStream(filename, validate_with_sql, report, chunk_size=READ_CHUNK_ROWS, buffer_size=SQL_WRITE_BUFFER_SIZE, workers=WORKSHEET_WORKERS):
+    '''Reads the Excel workbook file chunk_size rows at a time, creating and
+    writing the scripts for each chunk to a SQL file as soon as it is read, so
+    that memory use does not depend on the size of the workbook. Returns 'SQL'
+    if scripts were generated and have been saved, otherwise ''. Validation
+    errors are added to the validation report. With more than 1 worker each
+    worksheet is streamed to a temporary file by its own process and the files
+    are joined in the order of the worksheets.
+
+    :param1 filename: str
+    :param2 validate_with_sql: str
+    :param3 report: validation_report.ValidationReport
+    :param4 chunk_size: int
+    :param5 buffer_size: int
+    :param6 workers: int
+
+    :return: str
+    '''
+
+    any_changes = ''
+
+    if workers > 1:
+        worksheets, additional_box_val = excel_global.chooseWorksheets(
+            excel_reader.getSheetNames(filename))
+        sql_database = getSQLDatabase(validate_with_sql)
+        with tempfile.TemporaryDirectory() as directory:
+            results = parallel_worksheets.processWorkbookFile(
+                filename, worksheets, validate_with_sql, report, workers, sql_database, chunk_size, directory, buffer_size)
+            print(parallel_worksheets.formatWorksheetTimings(results))
+            if saveToSQL(parallel_worksheets.iterateScriptFiles(results), buffer_size):
+                any_changes = 'SQL'
+
+        return any_changes
+    if saveToSQL(iterateWorkbookFileScripts(filename, createWorksheetValidator(
+            validate_with_sql, report), report, chunk_size), buffer_size):
+        any_changes = 'SQL'
 
     return any_changes